@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Use of this source code is governed by a BSD-3-style
+# license that can be found in the LICENSE file.
+
+"""
+Binary polymerization with the 'reaction' engine (bipolymA for each
+pair) against the 'fragment' engine (half CRUs once per monomer, joined
+by bipolymF for each pair), on the polymer sets of the given monomer
+class pairs, e.g. diol x diCOOH and diamin x diNCO, over the classified
+sample set replicated `--scale` times. The products of both engines
+are checked to be the same.
+
+    python benchmarks/bench_fragment.py --pairs diol:diCOOH diamin:diNCO
+
+"""
+import argparse
+import os
+import time
+import pandas as pd
+from smipoly.smip import monc, polg
+from smipoly.smip.rules import rules
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..',
+                      'sample_data', '202207_smip_monset.csv')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--pairs', nargs='+',
+                        default=['diol:diCOOH', 'diamin:diNCO'],
+                        help='monomer class pairs as mon1:mon2')
+    opts = parser.parse_args()
+
+    df = pd.read_csv(SAMPLE)
+    df = pd.concat([df]*opts.scale, ignore_index=True)
+    DF = polg.biplym_src(monc.moncls(df, 'SMILES'), ['all', ])[1]
+    DF = DF.drop_duplicates(subset=['smip_cand_mons'])
+
+    for pair in opts.pairs:
+        cls = set(pair.split(':'))
+        sets = [(P_class, i) for P_class in rules.Ps_classL
+                for i, P_set in enumerate(rules.Ps_GenL[str(P_class)])
+                if {P_set[0], P_set[1]} == cls]
+        if len(sets) == 0:
+            print(f'{pair:<16}no polymer set')
+            continue
+        for P_class, i in sets:
+            P_set = rules.Ps_GenL[str(P_class)][i]
+            temp1 = list(DF.loc[DF[P_set[0]], 'smip_cand_mons'])
+            temp2 = list(DF.loc[DF[P_set[1]], 'smip_cand_mons'])
+            temp1, temp2, _ = polg.prune_pairs(temp1, temp2, P_class, i)
+            pairs = [(m1, m2) for m1 in temp1 for m2 in temp2 if m1 != m2]
+            if rules.Ps_GenH[P_class][i] is None:
+                print(f'{pair:<16}{P_class:<16}the reaction can not be split')
+                continue
+
+            rsl = {}
+            for engine in polg.ENGINES:
+                polg.half_frags.cache_clear()
+                t = time.perf_counter()
+                prods = polg.run_polym(pairs, P_class, i, engine=engine)
+                rsl[engine] = (time.perf_counter() - t,
+                               [sorted(set(e)) for e in prods])
+            t_r, ref = rsl['reaction']
+            t_f, prods = rsl['fragment']
+            print(f'{pair:<16}{P_class:<16}{len(pairs):>8} pairs '
+                  f'reaction {t_r:>8.2f} s  fragment {t_f:>8.2f} s  '
+                  f'speedup {t_r / t_f:.2f}  same {prods == ref}')
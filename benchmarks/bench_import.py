@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Use of this source code is governed by a BSD-3-style
+# license that can be found in the LICENSE file.
+
+"""
+Import time of the smipoly modules (python -X importtime) and the cost
+of the first access to the lazily loaded rules.
+
+    python benchmarks/bench_import.py
+
+"""
+import subprocess
+import sys
+
+MODULES = ['smipoly.smip.monc', 'smipoly.smip.polg']
+FIRST_ACCESS = (
+    'import time; from smipoly.smip.rules import rules; '
+    't = time.perf_counter(); rules.monLq; rules.exclLq; '
+    't1 = time.perf_counter(); rules.Ps_rxnL; rules.Ps_GenL; '
+    't2 = time.perf_counter(); '
+    'print(f"{(t1 - t) * 1e3:.1f} {(t2 - t1) * 1e3:.1f}")'
+)
+
+
+def importtime(stmt, repeat=5):
+    """Returns the best self and cumulative import time [ms] of
+    the smipoly modules."""
+    best = {}
+    for _ in range(repeat):
+        p = subprocess.run([sys.executable, '-X', 'importtime', '-c', stmt],
+                           capture_output=True, text=True, check=True)
+        for line in p.stderr.splitlines():
+            if 'smipoly' not in line:
+                continue
+            _, self_us, cum_us, mod = [e.strip()
+                                       for e in line.replace(':', '|').split('|')]
+            t = (int(self_us) / 1e3, int(cum_us) / 1e3)
+            if mod not in best or t[1] < best[mod][1]:
+                best[mod] = t
+    return best
+
+
+if __name__ == '__main__':
+    for mod in MODULES:
+        print('import', mod)
+        for k, (t_self, t_cum) in importtime('import ' + mod).items():
+            print(f'  {k:<24} self {t_self:>7.1f} ms   '
+                  f'cumulative {t_cum:>7.1f} ms')
+    p = subprocess.run([sys.executable, '-c', FIRST_ACCESS],
+                       capture_output=True, text=True, check=True)
+    t_cls, t_gen = p.stdout.split()
+    print(f'first access: classification rules {t_cls} ms, '
+          f'reaction rules {t_gen} ms')
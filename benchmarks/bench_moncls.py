@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Use of this source code is governed by a BSD-3-style
+# license that can be found in the LICENSE file.
+
+"""
+Throughput of the monomer classification on the bundled sample set,
+with the SMARTS parsed on every call (before) and with the compiled
+pattern registry (after), and of moncls/olecls with and without the
+pattern fingerprint screening.
+
+    python benchmarks/bench_moncls.py
+
+"""
+import os
+import time
+import pandas as pd
+from smipoly.smip import monc
+from smipoly.smip.funclib import (
+    genmol,
+    monomer_sel_mfg,
+    monomer_sel_pfg,
+    ole_sel_cru
+)
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..',
+                      'sample_data', '202207_smip_monset.csv')
+
+
+def classify(mols, monL, exclL):
+    rsl = []
+    for m in mols:
+        r = [monomer_sel_mfg(m, monL[i], exclL[i])[0]
+             for i in monc.mon_vals[0]]
+        r += [monomer_sel_pfg(m, monL[i], exclL[i], 2, 4)[0]
+              for i in monc.mon_vals[1]]
+        r += [ole_sel_cru(m, monL[i], exclL[i], 1, 4)[0]
+              for i in monc.mon_vals[3]]
+        rsl.append(r)
+    return rsl
+
+
+def run(label, mols, monL, exclL):
+    t = time.perf_counter()
+    rsl = classify(mols, monL, exclL)
+    t = time.perf_counter() - t
+    print(f'{label:<8}{len(mols) / t:>10.1f} rows/sec ({t:.2f} s)')
+    return rsl
+
+
+if __name__ == '__main__':
+    df = pd.read_csv(SAMPLE)
+    mols = list(df['SMILES'].apply(genmol))
+    print('rows =', len(mols))
+    before = run('before', mols, monc.monLg, monc.exclLg)
+    after = run('after', mols, monc.monLq, monc.exclLq)
+    assert before == after
+
+    for func in [monc.moncls, monc.olecls]:
+        ref = None
+        for screen in [False, True]:
+            t = time.perf_counter()
+            rsl = func(df.copy(), 'SMILES', screen=screen)
+            t = time.perf_counter() - t
+            print(f'{func.__name__:<8}screen={screen!s:<7}'
+                  f'{len(df) / t:>10.1f} rows/sec')
+            if ref is None:
+                ref = rsl
+        pd.testing.assert_frame_equal(rsl, ref)
+        print('skip ratio', {k: round(v, 3)
+              for k, v in rsl.attrs['prefilter'].items()})
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Use of this source code is governed by a BSD-3-style
+# license that can be found in the LICENSE file.
+
+"""
+Scaling of moncls and olecls over worker processes (n_jobs) on 
+the bundled sample set replicated `--scale` times, and of biplym
+on the classified sample set.
+
+    python benchmarks/bench_parallel.py --scale 10
+
+"""
+import argparse
+import os
+import time
+import pandas as pd
+from smipoly.smip import monc, polg
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..',
+                      'sample_data', '202207_smip_monset.csv')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=10)
+    parser.add_argument('--jobs', type=int, nargs='+',
+                        default=[1, 2, 4, 8, 16])
+    opts = parser.parse_args()
+
+    df = pd.read_csv(SAMPLE)
+    df = pd.concat([df]*opts.scale, ignore_index=True)
+    print('rows =', len(df))
+    for func in [monc.moncls, monc.olecls]:
+        ref = None
+        for n_jobs in opts.jobs:
+            t = time.perf_counter()
+            rsl = func(df.copy(), 'SMILES', n_jobs=n_jobs)
+            t = time.perf_counter() - t
+            if ref is None:
+                ref, t1 = rsl, t
+            pd.testing.assert_frame_equal(rsl, ref)
+            print(f'{func.__name__:<8}n_jobs={n_jobs:<4}{len(df) / t:>10.1f} '
+                  f'rows/sec  speedup {t1 / t:.2f}')
+
+    df = monc.moncls(pd.read_csv(SAMPLE), 'SMILES')
+    ref = None
+    for n_jobs in opts.jobs:
+        t = time.perf_counter()
+        rsl = polg.biplym(df, targ=['exc_ole'], n_jobs=n_jobs)
+        t = time.perf_counter() - t
+        if ref is None:
+            ref, t1 = rsl, t
+        pd.testing.assert_frame_equal(rsl, ref)
+        print(f'biplym  n_jobs={n_jobs:<4}{len(rsl) / t:>10.1f} '
+              f'polymers/sec  speedup {t1 / t:.2f}')
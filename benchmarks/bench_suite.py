@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Use of this source code is governed by a BSD-3-style
+# license that can be found in the LICENSE file.
+
+"""
+Benchmark suite of the classification and the polymer generation on
+the bundled sample set (sample_data/202207_smip_monset.csv) and on its
+replicas scaled up `--scales` times. Each case runs in a fresh process,
+and its wall time, throughput and peak memory (max RSS of the process,
+including the preceding classification for the generation cases) are
+recorded.
+
+    python benchmarks/bench_suite.py --out baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json
+
+Cases:
+    moncls, olecls          on the sample set x `--scales`
+    biplym                  per polymer class of ps_class.json,
+                            on the classified sample set x `--gen-scales`
+    ole_copolym             with ncomp = 1, 2, 3, on the classified
+                            sample set x `--gen-scales`
+
+The pairs of biplym grow quadratically and the combinations of
+ole_copolym with the power of ncomp with the scale, hence the separate,
+smaller default of `--gen-scales`.
+
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+import pandas as pd
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..',
+                      'sample_data', '202207_smip_monset.csv')
+
+# target olefin classes of ole_copolym per ncomp
+OLE_TARG = {1: ['acryl'], 2: ['acryl', 'styryl'],
+            3: ['acryl', 'styryl', 'vinylether']}
+
+
+def max_rss():
+    # peak resident set size of the process [MB]
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+
+def run_case(case):
+    """Runs a case in the calling (fresh) process and returns its record."""
+    from smipoly.smip import monc, polg
+    func, scale, arg = case
+    df = pd.read_csv(SAMPLE)
+    df = pd.concat([df]*scale, ignore_index=True)
+    if func == 'biplym':
+        df = monc.moncls(df, 'SMILES')
+    elif func == 'ole_copolym':
+        df = monc.olecls(df, 'SMILES')
+
+    t = time.perf_counter()
+    if func == 'moncls':
+        rsl = monc.moncls(df, 'SMILES')
+    elif func == 'olecls':
+        rsl = monc.olecls(df, 'SMILES')
+    elif func == 'biplym':
+        rsl = polg.biplym(df, targ=[arg])
+    else:
+        rsl = polg.ole_copolym(df, targ=list(OLE_TARG[arg]), ncomp=arg)
+    t = time.perf_counter() - t
+
+    rows = len(df) if func in ['moncls', 'olecls'] else len(rsl)
+    return {'case': '{}[{}]x{}'.format(func, arg, scale) if arg is not None
+            else '{}x{}'.format(func, scale),
+            'rows_in': len(df), 'rows': rows, 'time': t,
+            'throughput': rows / t if t > 0 else float('nan'),
+            'max_rss_mb': max_rss()}
+
+
+def cases(scales, gen_scales):
+    with open(os.path.join(os.path.dirname(__file__), '..', 'src',
+                           'smipoly', 'rules', 'ps_class.json')) as f:
+        P_classes = list(json.load(f))
+    for scale in scales:
+        yield ('moncls', scale, None)
+        yield ('olecls', scale, None)
+    for scale in gen_scales:
+        for P_class in P_classes:
+            yield ('biplym', scale, P_class)
+        for ncomp in OLE_TARG:
+            yield ('ole_copolym', scale, ncomp)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--gen-scales', type=int, nargs='+', default=[1])
+    parser.add_argument('--only', nargs='+', default=None,
+                        help='run only these functions, e.g. moncls biplym')
+    parser.add_argument('--out', default=None,
+                        help='write the records to this JSON file')
+    parser.add_argument('--baseline', default=None,
+                        help='compare with the records of an earlier run')
+    opts = parser.parse_args()
+
+    base = {}
+    if opts.baseline is not None:
+        with open(opts.baseline) as f:
+            base = {r['case']: r for r in json.load(f)['results']}
+
+    results = []
+    ctx = multiprocessing.get_context('spawn')
+    for case in cases(opts.scales, opts.gen_scales):
+        if opts.only is not None and case[0] not in opts.only:
+            continue
+        # a fresh process per case, so that max RSS is per case
+        with ctx.Pool(1) as pool:
+            r = pool.apply(run_case, (case,))
+        results.append(r)
+        line = (f"{r['case']:<32}{r['rows']:>10} rows {r['time']:>9.2f} s "
+                f"{r['throughput']:>10.1f} rows/s {r['max_rss_mb']:>8.1f} MB")
+        if r['case'] in base:
+            line += f"  speedup {base[r['case']]['time'] / r['time']:.2f}"
+        print(line, flush=True)
+
+    if opts.out is not None:
+        with open(opts.out, 'w') as f:
+            json.dump({'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'results': results}, f, indent=2)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) 2021 Mitsuru Ohno
+# Use of this source code is governed by a BSD-3-style
+# license that can be found in the LICENSE file.
+
+"""
+persistent store of the classification results of MonomerClassifier
+(monc.py), for incremental re-runs over a growing compound catalog.
+
+The results of moncls and olecls are stored per compound in a SQLite
+database, keyed by the canonical SMILES, the classifier and its
+parameters (minFG, maxFG). The store is bound to a hash of the rule
+files; when any of the rule files changes, all stored results are
+discarded on opening the store.
+
+"""
+import os
+import json
+import hashlib
+import sqlite3
+import numpy as np
+import pandas as pd
+from .funclib import cached_mol, genc_smi
+from .rules import db_file
+
+
+def rules_hash(path=None):
+    """
+    Computes the hash of the rule files.
+
+    Args:
+        path (str, optional): The rules directory. Defaults to the
+            'rules' directory of the package.
+
+    Returns:
+        str: The SHA-256 hex digest of the names and contents of
+        the rule files.
+
+    """
+    path = path if path is not None else db_file
+    h = hashlib.sha256()
+    for fnam in sorted(os.listdir(path)):
+        if fnam.endswith(('.json', '.pkl')):
+            h.update(fnam.encode())
+            with open(os.path.join(path, fnam), 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+def _to_json(obj):
+    # numpy scalars and arrays in the classification records
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(type(obj))
+
+
+class ClassStore:
+    """
+    Classification results keyed by (classifier, parameters,
+    canonical SMILES). Can be used as a context manager.
+
+    Args:
+        path (str): Path of the database file, created if missing.
+        rules_path (str, optional): The rules directory whose hash
+            the store is bound to. Defaults to the 'rules' directory
+            of the package.
+
+    Attributes:
+        rules (str): The hash of the rule files.
+        hits (int): Number of compounds found in the store.
+        misses (int): Number of compounds not found in the store.
+
+    """
+
+    def __init__(self, path, rules_path=None):
+        self.path = str(path)
+        self.rules = rules_hash(rules_path)
+        self.hits = 0
+        self.misses = 0
+        self._con = sqlite3.connect(self.path)
+        self._con.execute(
+            'CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT)')
+        self._con.execute(
+            'CREATE TABLE IF NOT EXISTS cls ('
+            'kind TEXT, params TEXT, smiles TEXT, rec TEXT, '
+            'PRIMARY KEY (kind, params, smiles))')
+        row = self._con.execute(
+            "SELECT v FROM meta WHERE k = 'rules'").fetchone()
+        if row is None or row[0] != self.rules:
+            # the rules changed, invalidate everything
+            self._con.execute('DELETE FROM cls')
+            self._con.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('rules', ?)",
+                (self.rules,))
+        self._con.commit()
+
+    def __len__(self):
+        return self._con.execute('SELECT COUNT(*) FROM cls').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, kind, params, smis):
+        """
+        Looks up the records of compounds.
+
+        Args:
+            kind (str): The classifier, 'moncls' or 'olecls'.
+            params (tuple): The parameters of the classifier.
+            smis (list): Canonical SMILES of the compounds.
+
+        Returns:
+            dict: The records (dict of column to value) of the stored
+            compounds, keyed by canonical SMILES.
+
+        """
+        params = json.dumps(params)
+        recs = {}
+        smis = list(dict.fromkeys(smis))
+        for i in range(0, len(smis), 500):
+            part = smis[i:i+500]
+            rows = self._con.execute(
+                'SELECT smiles, rec FROM cls WHERE kind = ? AND params = ? '
+                'AND smiles IN ({})'.format(','.join('?'*len(part))),
+                [kind, params] + part).fetchall()
+            recs.update((s, json.loads(r)) for s, r in rows)
+        self.hits += len(recs)
+        self.misses += len(smis) - len(recs)
+        return recs
+
+    def put(self, kind, params, recs):
+        """
+        Stores the records of compounds.
+
+        Args:
+            kind (str): The classifier, 'moncls' or 'olecls'.
+            params (tuple): The parameters of the classifier.
+            recs (dict): The records (dict of column to value),
+                keyed by canonical SMILES.
+
+        """
+        params = json.dumps(params)
+        self._con.executemany(
+            'INSERT OR REPLACE INTO cls VALUES (?, ?, ?, ?)',
+            [(kind, params, s, json.dumps(r, default=_to_json))
+             for s, r in recs.items()])
+        self._con.commit()
+
+    def classify(self, func, smis, kind, params):
+        """
+        Classifies the compounds, taking the stored ones from the store
+        and computing and storing only the new ones.
+
+        Args:
+            func (callable): Called as func(smis) on the SMILES of the new
+                compounds, returning a DataFrame with their index and
+                the column 'smip_cand_mons' (canonical SMILES).
+            smis (pd.Series): SMILES strings of the compounds.
+            kind (str): The classifier, 'moncls' or 'olecls'.
+            params (tuple): The parameters of the classifier.
+
+        Returns:
+            pd.DataFrame: The result of `func` for all compounds,
+            in the order and with the index of `smis`.
+
+        """
+        smis_p = smis.reset_index(drop=True)
+        can = smis_p.apply(cached_mol).apply(genc_smi)
+        valid = can.notna()
+        recs = self.get(kind, params, list(can[valid]))
+        hit = valid & can.isin(list(recs))
+
+        DF_new = func(smis_p[~hit])
+        new = DF_new['smip_cand_mons'].notna()
+        self.put(kind, params, {
+            s: {k: v for k, v in r.items() if k != 'smip_cand_mons'}
+            for s, r in zip(DF_new.loc[new, 'smip_cand_mons'],
+                            DF_new[new].to_dict('records'))})
+
+        if hit.any():
+            DF_old = pd.DataFrame([recs[s] for s in can[hit]],
+                                  index=can[hit].index)
+            DF_old.insert(0, 'smip_cand_mons', can[hit])
+            DF = pd.concat([DF_new, DF_old[DF_new.columns]]).sort_index()
+        else:
+            DF = DF_new
+        DF.index = smis.index
+        return DF
+
+    def close(self):
+        """Closes the database."""
+        self._con.close()
+
+# end
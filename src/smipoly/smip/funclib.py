@@ -13,10 +13,17 @@ functions for MonomerClassifier (monc.py) and
 PolymerGenerator (polyg.py).
 
 """
+import os
+import time
+import itertools
+import collections
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import numpy as np
 import pandas as pd
-from rdkit import rdBase, Chem
+from rdkit import rdBase, Chem, DataStructs
 from rdkit.Chem import AllChem
+from .profiling import record
 
 
 def genmol(s):
@@ -57,10 +64,290 @@ def genc_smi(m):
         cS = np.nan
     return cS
 
+
+# molecule cache, shared by the classification and the generation
+@lru_cache(maxsize=2**17)
+def smi2bin(s):
+    """
+    Parses a SMILES string once per process and keeps the molecule
+    as its RDKit binary, which is restored much faster than parsed.
+
+    Args:
+        s (str): A SMILES string.
+
+    Returns:
+        bytes or None: The binary of the molecule, or None if
+        the SMILES string is invalid.
+
+    """
+    m = Chem.MolFromSmiles(s)
+    if m is None:
+        return None
+    return m.ToBinary()
+
+
+def cached_mol(s):
+    """
+    Cached version of genmol. A molecule parsed once is restored from
+    its binary (smi2bin), so that a monomer appearing in many pairs
+    is parsed only once. Each call returns a new molecule object.
+
+    Args:
+        s (str): A SMILES string.
+
+    Returns:
+        rdkit.Chem.Mol or numpy.nan: A molecular object if the SMILES 
+        string is valid (None if RDKit fails to parse it), otherwise 
+        returns numpy.nan.
+
+    """
+    try:
+        b = smi2bin(s)
+    except:
+        return np.nan
+    if b is None:
+        return None
+    return Chem.Mol(b)
+
+
+# registry of compiled SMARTS patterns
+@lru_cache(maxsize=None)
+def smarts2mol(s):
+    """
+    Compiles a SMARTS string into a query molecule once per process.
+    The source SMARTS is kept as the 'smarts' property of the query.
+
+    Args:
+        s (str): A SMARTS string.
+
+    Returns:
+        rdkit.Chem.Mol: The compiled query molecule.
+
+    """
+    patt = Chem.MolFromSmarts(s)
+    patt.SetProp('smarts', s)
+    return patt
+
+
+def compile_patts(pattL):
+    """
+    Compiles the SMARTS of the rule dictionary ('mon_lst.json' or 
+    'excl_lst.json') into query molecules, keyed by monomer class ID.
+
+    Args:
+        pattL (dict): A dictionary of a SMARTS string or a list of 
+            SMARTS strings indexed by monomer class ID.
+
+    Returns:
+        dict: A dictionary with the same keys, holding the compiled 
+        query molecule(s) instead of the SMARTS string(s).
+
+    """
+    return {
+        k: smarts2mol(v) if isinstance(v, str) else [smarts2mol(e) for e in v]
+        for k, v in pattL.items()
+    }
+
+
+def get_patt(patt):
+    """
+    Returns a query molecule for the given pattern. SMARTS strings are 
+    parsed on every call, compiled query molecules are used as is.
+
+    Args:
+        patt (str or rdkit.Chem.Mol): A SMARTS string or a query molecule 
+            generated by smarts2mol.
+
+    Returns:
+        rdkit.Chem.Mol: The query molecule.
+
+    """
+    if isinstance(patt, Chem.Mol):
+        return patt
+    return Chem.MolFromSmarts(patt)
+
+
+def get_smarts(patt):
+    """
+    Returns the source SMARTS string of the given pattern.
+
+    Args:
+        patt (str or rdkit.Chem.Mol): A SMARTS string or a query molecule 
+            generated by smarts2mol.
+
+    Returns:
+        str: The SMARTS string.
+
+    """
+    if isinstance(patt, Chem.Mol):
+        return patt.GetProp('smarts')
+    return patt
+
+
+# substructure screening by pattern fingerprints
+@lru_cache(maxsize=None)
+def smarts2fp(s):
+    """
+    Generates the pattern fingerprint of a SMARTS string once per process.
+
+    Args:
+        s (str): A SMARTS string.
+
+    Returns:
+        rdkit.DataStructs.ExplicitBitVect: The pattern fingerprint of
+        the query.
+
+    """
+    return Chem.PatternFingerprint(smarts2mol(s))
+
+
+_patt_fps = {}
+
+
+def patt_fp(patt):
+    """
+    Returns the pattern fingerprint of a SMARTS string or a compiled 
+    query molecule, looked up by the pattern object itself.
+
+    Args:
+        patt (str or rdkit.Chem.Mol): A SMARTS string or a query molecule 
+            generated by smarts2mol.
+
+    Returns:
+        rdkit.DataStructs.ExplicitBitVect: The pattern fingerprint of
+        the query.
+
+    """
+    fp = _patt_fps.get(patt)
+    if fp is None:
+        fp = _patt_fps[patt] = smarts2fp(get_smarts(patt))
+    return fp
+
+
+def screen_patts(mfp, patts):
+    """
+    Drops the patterns which can not match a molecule, judged from
+    the pattern fingerprints. A pattern is dropped only if some bit of
+    its fingerprint is missing in the fingerprint of the molecule, so
+    no pattern which matches the molecule is dropped.
+
+    Args:
+        mfp (rdkit.DataStructs.ExplicitBitVect): The pattern fingerprint
+            of the molecule (Chem.PatternFingerprint(m)).
+        patts (list of str or rdkit.Chem.Mol): SMARTS strings or
+            compiled query molecules.
+
+    Returns:
+        list: The patterns that may match the molecule.
+
+    """
+    return [
+        patt for patt in patts
+        if DataStructs.AllProbeBitsMatch(patt_fp(patt), mfp)
+    ]
+
+
+# parallel execution over chunks of a Series
+def run_chunks(func, ser, n_jobs=None, chunksize=None,
+               initializer=None, args=()):
+    """
+    Applies a chunk function to a Series, either in the calling process 
+    or split into chunks over a pool of worker processes. The results are 
+    merged back in the original row order.
+
+    Args:
+        func (callable): The chunk function, called as 
+            func(chunk, *args) and returning a DataFrame with the index 
+            of the chunk. Must be picklable (defined at module level).
+        ser (pd.Series): The input Series.
+        n_jobs (int, optional): Number of worker processes. 
+            -1 uses all CPUs. Defaults to 1 (no worker process).
+        chunksize (int, optional): Number of rows per chunk. Defaults to 
+            splitting the input into 4 chunks per worker.
+        initializer (callable, optional): Called once in each worker 
+            process on start up, e.g. to load the rules.
+        args (tuple, optional): Extra arguments passed to `func`.
+
+    Returns:
+        pd.DataFrame: The concatenated results of all chunks.
+
+    """
+    if n_jobs is None:
+        n_jobs = 1
+    elif n_jobs < 0:
+        n_jobs = os.cpu_count()
+    if n_jobs == 1 or len(ser) == 0:
+        return func(ser, *args)
+    if chunksize is None:
+        chunksize = -(-len(ser) // (n_jobs * 4))
+    chunks = [ser.iloc[i:i+chunksize] for i in range(0, len(ser), chunksize)]
+    with ProcessPoolExecutor(max_workers=n_jobs,
+                             initializer=initializer) as executor:
+        rsl = list(executor.map(func, chunks, *[[a]*len(chunks) for a in args]))
+    return pd.concat(rsl)
+
+
+# substructure matches shared within a molecule
+class MatchContext:
+    """
+    Substructure matches of one molecule, searched once per pattern and
+    shared between the FG counting, the exclusion checks and the CRU
+    generation, including across the monomer classes evaluated on the
+    same molecule.
+
+    Args:
+        m (rdkit.Chem.Mol): The molecule.
+
+    """
+
+    def __init__(self, m):
+        self.m = m
+        self._matches = {}
+        self._has = {}
+
+    def matches(self, patt):
+        """
+        Returns the substructure matches of a pattern.
+
+        Args:
+            patt (str or rdkit.Chem.Mol): A SMARTS string or a query
+                molecule generated by smarts2mol.
+
+        Returns:
+            tuple: The matches (GetSubstructMatches).
+
+        """
+        matchs = self._matches.get(patt)
+        if matchs is None:
+            matchs = self._matches[patt] = \
+                self.m.GetSubstructMatches(get_patt(patt))
+        return matchs
+
+    def has(self, patt):
+        """
+        Returns whether a pattern matches the molecule.
+
+        Args:
+            patt (str or rdkit.Chem.Mol): A SMARTS string or a query
+                molecule generated by smarts2mol.
+
+        Returns:
+            bool: True if the pattern matches.
+
+        """
+        matchs = self._matches.get(patt)
+        if matchs is not None:
+            return len(matchs) != 0
+        chk = self._has.get(patt)
+        if chk is None:
+            chk = self._has[patt] = self.m.HasSubstructMatch(get_patt(patt))
+        return chk
+
+
 # count the number of the targetted functional group
 
 
-def count_fg(m, patt):
+def count_fg(m, patt, ctx=None):
     """
     Counts the number of functional groups (FG) in a molecule 
     based on a given pattern. 
@@ -70,13 +357,18 @@ def count_fg(m, patt):
             for substructure matches.
         patt (rdkit.Chem.Mol): The pattern molecule used
             to identify substructure matches.
+        ctx (MatchContext, optional): The match context of `m`
+            to reuse. Defaults to None.
 
     Returns:
         int: The number of functional groups identified in the molecule.
 
     """
     numFG = 0
-    matchs = m.GetSubstructMatches(patt)
+    if ctx is None:
+        matchs = m.GetSubstructMatches(patt)
+    else:
+        matchs = ctx.matches(patt)
     if len(matchs) >= 2:
         not_match = []
         for i in range(0, len(matchs)-1):
@@ -93,7 +385,7 @@ def count_fg(m, patt):
 # classify candidate compounds for mono-FG monomer
 
 
-def monomer_sel_mfg(m, mons, excls):
+def monomer_sel_mfg(m, mons, excls, ctx=None):
     """
     Determining whether the given small molecule compound 
     qualifies as a self-polymerizable monomer and 
@@ -102,10 +394,14 @@ def monomer_sel_mfg(m, mons, excls):
     Args:
         m (rdkit.Chem.Mol): The molecule to be analyzed. 
             If None or NaN, the function returns default values.
-        mons (list of str): A list of SMARTS strings representing 
+        mons (list of str or rdkit.Chem.Mol): A list of SMARTS strings 
+            (or compiled query molecules) representing 
             monomer patterns to match against the molecule.
-        excls (list of str): A list of SMARTS strings representing 
+        excls (list of str or rdkit.Chem.Mol): A list of SMARTS strings 
+            (or compiled query molecules) representing 
             exclusion patterns to check against the molecule.
+        ctx (MatchContext, optional): The match context of `m`
+            to reuse. Defaults to None.
 
     Returns:
         list: A list containing:
@@ -117,19 +413,19 @@ def monomer_sel_mfg(m, mons, excls):
 
     """
     if pd.notna(m):
+        if ctx is None:
+            ctx = MatchContext(m)
         chk_c = 0
         fchk_c = 0
         chk = []
         if len(mons) != 0:
             for mon in mons:
-                patt = Chem.MolFromSmarts(mon)
-                if m.HasSubstructMatch(patt):
-                    chk_c = len(m.GetSubstructMatches(patt))
+                if ctx.has(mon):
+                    chk_c = len(ctx.matches(mon))
                     fchk_c = fchk_c+chk_c
                     chk_excl = []
                     for excl in excls:
-                        excl_patt = Chem.MolFromSmarts(excl)
-                        if m.HasSubstructMatch(excl_patt):
+                        if ctx.has(excl):
                             chk_excl.append(False)
                         else:
                             chk_excl.append(True)
@@ -152,7 +448,7 @@ def monomer_sel_mfg(m, mons, excls):
 
 # classify candidate compounds for poly-FG monomer
 # count objective FGs
-def monomer_sel_pfg(m, mons, excls, minFG, maxFG):
+def monomer_sel_pfg(m, mons, excls, minFG, maxFG, ctx=None):
     """
     Determining whether the given small molecule compound qualifies as 
     a monomer or not. If so, count a number of polymerizeble 
@@ -160,12 +456,16 @@ def monomer_sel_pfg(m, mons, excls, minFG, maxFG):
 
     Args:
         m (rdkit.Chem.Mol): The monomer molecule to evaluate.
-        mons (list of str): A list of SMARTS patterns representing the 
+        mons (list of str or rdkit.Chem.Mol): A list of SMARTS patterns 
+            (or compiled query molecules) representing the 
             functional groups to count in the monomer.
-        excls (list of str): A list of SMARTS patterns representing the 
+        excls (list of str or rdkit.Chem.Mol): A list of SMARTS patterns 
+            (or compiled query molecules) representing the 
             exclusion patterns to check against the monomer.
         minFG (int): The minimum number of functional groups required.
         maxFG (int): The maximum number of functional groups allowed.
+        ctx (MatchContext, optional): The match context of `m`
+            to reuse. Defaults to None.
 
     Returns:
         list: A list containing:
@@ -176,18 +476,18 @@ def monomer_sel_pfg(m, mons, excls, minFG, maxFG):
 
     """
     if pd.notna(m):
+        if ctx is None:
+            ctx = MatchContext(m)
         chk_c = 0
         fchk_c = 0
         if len(mons) != 0:
             for mon in mons:
-                patt = Chem.MolFromSmarts(mon)
-                chk_c = count_fg(m, patt)
+                chk_c = count_fg(m, mon, ctx)
                 fchk_c = fchk_c + chk_c
             if minFG <= fchk_c <= maxFG:
                 chk = []
                 for excl in excls:
-                    excl_patt = Chem.MolFromSmarts(excl)
-                    if m.HasSubstructMatch(excl_patt):
+                    if ctx.has(excl):
                         chk.append(False)
                     else:
                         chk.append(True)
@@ -204,6 +504,192 @@ def monomer_sel_pfg(m, mons, excls, minFG, maxFG):
     return [fchk, fchk_c]
 
 
+# classify candidate compounds for all monomer classes at once
+def moncls_mol(m, clsL, minFG, maxFG, screen=None):
+    """
+    Evaluates all monomer classes against one molecule in a single call.
+
+    Args:
+        m (rdkit.Chem.Mol): The molecule to be analyzed.
+        clsL (list of tuple): The monomer classes in bit order, each given
+            as (mons, excls, pfg), where `mons` and `excls` are the
+            monomer and exclusion patterns of the class and `pfg` is True
+            for a poly-functionalized monomer class (monomer_sel_pfg) and
+            False for a mono-functionalized one (monomer_sel_mfg).
+        minFG (int): Minimum number of functional groups
+            for poly-functionalized monomers.
+        maxFG (int): Maximum number of functional groups
+            for poly-functionalized monomers.
+        screen (bool, optional): Whether to skip the substructure 
+            searches which can not match by the pattern fingerprints 
+            (screen_patts). The result does not depend on it. 
+            Defaults to False.
+
+    Returns:
+        tuple: A compact result record containing:
+            - mask (int): Bitmask of the classes; bit j is set if
+              the molecule qualifies as a monomer of clsL[j].
+            - counts (tuple of int): The FG count for each class.
+            - skip (int): Bitmask of the classes skipped by the
+              screening without any substructure search.
+        A molecule that could not be parsed gives (0, (0, ...), 0).
+
+    """
+    if screen is None:
+        screen = False
+    mask = 0
+    skip = 0
+    counts = []
+    if m is None or not pd.notna(m):
+        return (mask, (0, )*len(clsL), skip)
+    if screen:
+        mfp = Chem.PatternFingerprint(m)
+    ctx = MatchContext(m)
+    for j, (mons, excls, pfg) in enumerate(clsL):
+        if screen:
+            mons_s = screen_patts(mfp, mons)
+            if len(mons_s) == 0 and len(mons) != 0 and (not pfg or minFG > 0):
+                # no FG found; it is not a monomer of this class
+                skip |= 1 << j
+                counts.append(0)
+                continue
+            if len(mons_s) != 0:
+                mons = mons_s
+            excls = screen_patts(mfp, excls)
+        if pfg:
+            chk = monomer_sel_pfg(m, mons, excls, minFG, maxFG, ctx)
+        else:
+            chk = monomer_sel_mfg(m, mons, excls, ctx)
+        if chk[0]:
+            mask |= 1 << j
+        counts.append(chk[1])
+    return (mask, tuple(counts), skip)
+
+
+# compiled sequential reactions
+# steps of (FG ID in monL, reaction ID in Ps_rxnL), applied in order while
+# the FG remains. None as the reaction ID rejects a product having the FG.
+SEQ_CHAIN = ((202, 202), (203, 203), (204, 204))
+SEQ_SUCCESSIVE_DEFAULT = ((201, 201), (202, 202), (203, 203), (204, 204),
+                          (205, 205), (206, None))
+SEQ_SUCCESSIVE = {
+    'polyolefin': ((200, 200),),
+    'polyoxazolidone': ((201, 201), (205, 208)),
+    'polyimide': SEQ_SUCCESSIVE_DEFAULT[:5] + ((206, 207),),
+    'polyester': SEQ_SUCCESSIVE_DEFAULT[:5] + ((206, 206),),
+}
+
+# number of reactions and time [s] per step, keyed by (FG ID, reaction ID)
+seq_times = collections.defaultdict(lambda: [0, 0.0])
+
+# number of redundant reaction products skipped before the sequential
+# reactions, keyed by the polymerization function
+prod_dupl = collections.Counter()
+
+
+def dedup_prods(prods, func, keep=None):
+    """
+    Sanitizes the products of a RunReactants call and drops the products 
+    identical (by canonical SMILES) to another one, e.g. those of 
+    the equivalent FGs of a symmetric monomer, so that the sequential 
+    reactions run once per distinct product. The number of dropped 
+    products is added to `prod_dupl[func]` and recorded as the rows 
+    of the stage 'polym.dupl' of the active Profiler (profiling.py).
+
+    Args:
+        prods (tuple): The product tuples of RunReactants.
+        func (str): The name of the calling polymerization function.
+        keep (str, optional): Which of the identical products to keep,
+            'first' or 'last'. Defaults to 'first'.
+
+    Returns:
+        list: The distinct sanitized products (rdkit.Chem.Mol), 
+        in the order of `prods`.
+
+    """
+    if keep is None:
+        keep = 'first'
+    seen = set()
+    prod_Ps = []
+    n = 0
+    for prod_P in (prods if keep == 'first' else reversed(prods)):
+        try:
+            prod_P = prod_P[0]
+            Chem.SanitizeMol(prod_P)
+        except:
+            continue
+        smi = genc_smi(prod_P)
+        if smi in seen:
+            n += 1
+            continue
+        seen.add(smi)
+        prod_Ps.append(prod_P)
+    if keep != 'first':
+        prod_Ps.reverse()
+    prod_dupl[func] += n
+    record('polym.dupl', 0.0, rows=n)
+    return prod_Ps
+
+
+def run_seq(prod_P, steps, monL, Ps_rxnL):
+    """
+    Applies the sequential reaction steps to a product molecule. Each
+    step reacts the FG repeatedly until it remains no more, producing
+    only the first product of each reaction run. The FG queries are
+    compiled once per process (smarts2mol). The number of reactions
+    and the time of each step are accumulated in `seq_times` and
+    recorded as the stage 'seq.<FG ID>:<reaction ID>' of the active
+    Profiler (profiling.py).
+
+    Args:
+        prod_P (rdkit.Chem.Mol): The product molecule to be processed.
+        steps (tuple): (FG ID, reaction ID) pairs, e.g. SEQ_CHAIN.
+        monL (dict): SMARTS (or query molecules) of FGs indexed by ID.
+        Ps_rxnL (dict): Polymerization reactions indexed by ID.
+
+    Returns:
+        rdkit.Chem.Mol: The processed molecule.
+
+    Raises:
+        ValueError: If the product has an FG without reaction.
+
+    """
+    if prod_P.GetNumAtoms() == 0:
+        return prod_P
+    for fg, rxn in steps:
+        patt = monL[fg]
+        if not isinstance(patt, Chem.Mol):
+            patt = smarts2mol(patt)
+        t = time.perf_counter()
+        n = 0
+        while prod_P.HasSubstructMatch(patt):
+            if rxn is None:
+                raise ValueError('no sequential reaction for FG {}'.format(fg))
+            prod_P = Ps_rxnL[rxn].RunReactants((prod_P,), 1)[0][0]
+            Chem.SanitizeMol(prod_P)
+            n += 1
+        t = time.perf_counter() - t
+        rec = seq_times[(fg, rxn)]
+        rec[0] += n
+        rec[1] += t
+        record('seq.{}:{}'.format(fg, rxn), t, calls=n, rows=1)
+    return prod_P
+
+
+def seq_report():
+    """
+    Returns the counters of the sequential reaction steps of
+    the calling process.
+
+    Returns:
+        pd.DataFrame: 'reactions' and 'time' [s] indexed by
+        (FG ID, reaction ID).
+
+    """
+    return pd.DataFrame.from_dict(
+        dict(seq_times), orient='index', columns=['reactions', 'time'])
+
+
 # define sequential polymerization for chain polymerization except polyolefine
 def seq_chain(prod_P, targ_mon1, Ps_rxnL, mon_dic, monL):
     """
@@ -226,25 +712,8 @@ def seq_chain(prod_P, targ_mon1, Ps_rxnL, mon_dic, monL):
         rdkit.Chem.Mol: The processed molecule after applying the reactions.
 
     """
-    if Chem.MolToSmiles(prod_P) != '':
-        if targ_mon1 not in ['vinyl', 'cOle']:
-            seqFG2 = Chem.MolFromSmarts(monL[[202][0]])
-            seqFG3 = Chem.MolFromSmarts(monL[[203][0]])
-            seqFG4 = Chem.MolFromSmarts(monL[[204][0]])
-            while prod_P.HasSubstructMatch(seqFG2):
-                prods = Ps_rxnL[202].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-            while prod_P.HasSubstructMatch(seqFG3):
-                prods = Ps_rxnL[203].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-            while prod_P.HasSubstructMatch(seqFG4):
-                prods = Ps_rxnL[204].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-        else:
-            prod_P = prod_P
+    if targ_mon1 not in ['vinyl', 'cOle']:
+        prod_P = run_seq(prod_P, SEQ_CHAIN, monL, Ps_rxnL)
     return prod_P
 
 
@@ -278,67 +747,17 @@ def seq_successive(prod_P, targ_rxn, monL, Ps_rxnL, P_class):
         - Specific reaction sequences are applied for classes 
           such as 'polyolefin', 'polyoxazolidone', 'polyimide',
           and 'polyester'.
-        - If the `P_class` is not recognized,
-          the product molecule is returned unchanged.
-
-    """
-    if Chem.MolToSmiles(prod_P) != '':
-        seqFG0 = Chem.MolFromSmarts(monL[[200][0]])
-        seqFG1 = Chem.MolFromSmarts(monL[[201][0]])
-        seqFG2 = Chem.MolFromSmarts(monL[[202][0]])
-        seqFG3 = Chem.MolFromSmarts(monL[[203][0]])
-        seqFG4 = Chem.MolFromSmarts(monL[[204][0]])
-        seqFG5 = Chem.MolFromSmarts(monL[[205][0]])
-        seqFG6 = Chem.MolFromSmarts(monL[[206][0]])
-        if P_class not in ['polyolefin', 'polyoxazolidone', ]:
-            while prod_P.HasSubstructMatch(seqFG1):
-                prods = Ps_rxnL[201].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-            while prod_P.HasSubstructMatch(seqFG2):
-                prods = Ps_rxnL[202].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-            while prod_P.HasSubstructMatch(seqFG3):
-                prods = Ps_rxnL[203].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-            while prod_P.HasSubstructMatch(seqFG4):
-                prods = Ps_rxnL[204].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-            while prod_P.HasSubstructMatch(seqFG5):
-                prods = Ps_rxnL[205].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-            while prod_P.HasSubstructMatch(seqFG6):
-                if P_class == 'polyimide':
-                    prods = Ps_rxnL[207].RunReactants([prod_P])
-                elif P_class == 'polyester':
-                    prods = Ps_rxnL[206].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-        elif P_class in ['polyoxazolidone', ]:
-            while prod_P.HasSubstructMatch(seqFG1):
-                prods = Ps_rxnL[201].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-            while prod_P.HasSubstructMatch(seqFG5):
-                prods = Ps_rxnL[208].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-        elif P_class in ['polyolefin', ]:
-            while prod_P.HasSubstructMatch(seqFG0):
-                prods = Ps_rxnL[200].RunReactants([prod_P])
-                prod_P = prods[0][0]
-                Chem.SanitizeMol(prod_P)
-        else:
-            prod_P = prod_P
-    return prod_P
+        - The steps of each class are given in SEQ_SUCCESSIVE, the other
+          classes use SEQ_SUCCESSIVE_DEFAULT.
+
+    """
+    steps = SEQ_SUCCESSIVE.get(P_class, SEQ_SUCCESSIVE_DEFAULT)
+    return run_seq(prod_P, steps, monL, Ps_rxnL)
 
 
 # homopolymerization
-def homopolymA(mon1, mons, excls, targ_mon1, Ps_rxnL, mon_dic, monL):
+def homopolymA(mon1, mons, excls, targ_mon1, Ps_rxnL, mon_dic, monL,
+               maxProducts=None):
     """
     Generates a polymer CRU formed from a single monomer by
     iteratively reacting a monomer until no further reactions are possible.
@@ -356,20 +775,28 @@ def homopolymA(mon1, mons, excls, targ_mon1, Ps_rxnL, mon_dic, monL):
             indexed by integers.
         mon_dic (dict):  A dictionary containing monomer class. 
         monL (list): A list of monomer SMARTS patterns indexed by integers.
+        maxProducts (int, optional): Maximum number of products of
+            each reaction run. Defaults to 1000 (as RunReactants).
 
     Returns:
         list: A list of SMILES strings representing the generated homopolymers.
+        The identical products of a reaction run appear once (dedup_prods).
 
     """
+    if maxProducts is None:
+        maxProducts = 1000
     prod_P = mon1
     # 生成したポリマーがさらに重合可能な場合、再度反応
     while monomer_sel_mfg(prod_P, mons, excls)[0] == True:
-        prods = Ps_rxnL[mon_dic[targ_mon1]].RunReactants([prod_P])
+        prods = Ps_rxnL[mon_dic[targ_mon1]].RunReactants(
+            [prod_P], maxProducts)
+        # the last product goes on reacting, so the last one is kept
+        prods = dedup_prods(prods, 'homopolymA', keep='last')
         prod_Ps = []
+        if len(prods) == 0:
+            break
         for prod_P in prods:
             try:
-                Chem.SanitizeMol(prod_P[0])
-                prod_P = prod_P[0]
                 prod_P = seq_chain(prod_P, targ_mon1=targ_mon1,
                                    Ps_rxnL=Ps_rxnL, mon_dic=mon_dic, monL=monL)
                 prod_Ps.append(prod_P)
@@ -379,7 +806,7 @@ def homopolymA(mon1, mons, excls, targ_mon1, Ps_rxnL, mon_dic, monL):
 
 
 # binarypolymerization
-def bipolymA(reactant, targ_rxn, monL, Ps_rxnL, P_class):
+def bipolymA(reactant, targ_rxn, monL, Ps_rxnL, P_class, maxProducts=None):
     """
     Generates a polymer CRU formed from two monomers by iteratively reacting 
     a monomer until no further reactions are possible. 
@@ -392,19 +819,21 @@ def bipolymA(reactant, targ_rxn, monL, Ps_rxnL, P_class):
         monL (list):  A list of monomer SMARTS patterns indexed by integers.
         Ps_rxnL (dict): A list of monomer SMARTS patterns indexed by integers.
         P_class (type): A class type used for polymer processing.
+        maxProducts (int, optional): Maximum number of products of
+            the reaction. Defaults to 1000 (as RunReactants).
 
     Returns:
         list: A list of SMILES strings representing 
-        the generated polymer products.
+        the generated polymer products. The identical products of
+        the reaction are processed and appear once (dedup_prods).
 
     """
-    prod_P = Chem.MolFromSmiles('')
-    prods = targ_rxn.RunReactants(reactant)
+    if maxProducts is None:
+        maxProducts = 1000
+    prods = targ_rxn.RunReactants(reactant, maxProducts)
     prod_Ps = []
-    for prod_P in prods:
+    for prod_P in dedup_prods(prods, 'bipolymA'):
         try:
-            Chem.SanitizeMol(prod_P[0])
-            prod_P = prod_P[0]
             prod_P = seq_successive(
                 prod_P,
                 targ_rxn=targ_rxn,
@@ -418,6 +847,143 @@ def bipolymA(reactant, targ_rxn, monL, Ps_rxnL, P_class):
     return [genc_smi(m) for m in prod_Ps]
 
 
+# fragment stitching for binary polymerization
+def half_rxns(rxn):
+    """
+    Splits a binary polymerization reaction into two half reactions, 
+    one per reactant template. Each half reaction generates the part 
+    of the product template formed from its reactant, in which the bonds 
+    to the other part are replaced by bonds to dummy atoms. The dummy 
+    atoms of a bond are labeled with the same isotope on both sides, 
+    so that the parts are joined back into the product by Chem.molzip 
+    (bipolymF). The unmapped atoms of the product template go with 
+    the part holding the most of their neighbors.
+
+    Args:
+        rxn (rdkit.Chem.rdChemReactions.ChemicalReaction): The reaction
+            with two reactant templates and one product template.
+
+    Returns:
+        tuple or None: The half reactions of the first and the second
+        reactant, or None if the reaction can not be split.
+
+    """
+    if rxn.GetNumReactantTemplates() != 2 or \
+            rxn.GetNumProductTemplates() != 1:
+        return None
+    side = {}
+    for s in range(2):
+        for a in rxn.GetReactantTemplate(s).GetAtoms():
+            if a.GetAtomMapNum():
+                side[a.GetAtomMapNum()] = s
+    prod = rxn.GetProductTemplate(0)
+    sides = [side.get(a.GetAtomMapNum()) if a.GetAtomMapNum() else None
+             for a in prod.GetAtoms()]
+    changed = True
+    while changed:
+        changed = False
+        for a in prod.GetAtoms():
+            if sides[a.GetIdx()] is None:
+                nbrs = [sides[n.GetIdx()] for n in a.GetNeighbors()
+                        if sides[n.GetIdx()] is not None]
+                if len(nbrs) != 0:
+                    sides[a.GetIdx()] = int(nbrs.count(1) > nbrs.count(0))
+                    changed = True
+    sides = [0 if s is None else s for s in sides]
+    cross = [b for b in prod.GetBonds()
+             if sides[b.GetBeginAtomIdx()] != sides[b.GetEndAtomIdx()]]
+    if len(cross) == 0:
+        return None
+
+    halves = []
+    for s in range(2):
+        half_P = Chem.RWMol(prod)
+        for k, b in enumerate(cross, 1):
+            i = b.GetBeginAtomIdx()
+            if sides[i] != s:
+                i = b.GetEndAtomIdx()
+            dummy = Chem.Atom(0)
+            dummy.SetIsotope(k)
+            j = half_P.AddAtom(dummy)
+            half_P.AddBond(i, j, b.GetBondType())
+        for i in sorted([i for i, t in enumerate(sides) if t != s],
+                        reverse=True):
+            half_P.RemoveAtom(i)
+        half = AllChem.ChemicalReaction()
+        half.AddReactantTemplate(rxn.GetReactantTemplate(s))
+        half.AddProductTemplate(half_P.GetMol())
+        half.Initialize()  # need initialization
+        halves.append(half)
+    return tuple(halves)
+
+
+def half_cru(m, half_rxn, monL, Ps_rxnL, P_class):
+    """
+    Generates the half CRUs of a monomer with a half reaction
+    (half_rxns), one per match of the reactant template. The other FGs 
+    of the monomer are converted by the sequential reactions of 
+    the polymer class (seq_successive), as bipolymA does on the whole 
+    product.
+
+    Args:
+        m (rdkit.Chem.Mol): The monomer.
+        half_rxn (rdkit.Chem.rdChemReactions.ChemicalReaction):
+            The half reaction of the monomer's reactant template.
+        monL (dict): SMARTS patterns of FGs indexed by integers.
+        Ps_rxnL (dict): Polymerization reactions indexed by integers.
+        P_class (str): The polymer class.
+
+    Returns:
+        list: The distinct half CRUs (rdkit.Chem.Mol) with the labeled
+        dummy atoms.
+
+    """
+    frags = []
+    for prod_P in dedup_prods(half_rxn.RunReactants((m, )), 'half_cru'):
+        try:
+            prod_P = seq_successive(
+                prod_P,
+                targ_rxn=half_rxn,
+                monL=monL,
+                Ps_rxnL=Ps_rxnL,
+                P_class=P_class
+            )
+            frags.append(prod_P)
+        except:
+            pass
+    return frags
+
+
+def bipolymF(frags1, frags2):
+    """
+    Generates the polymer CRUs of two monomers by joining their half 
+    CRUs (half_cru) at the labeled dummy atoms. The result equals that
+    of bipolymA, as long as the sequential reactions only convert
+    the FGs left in each monomer, which holds for the rules in 
+    'ps_rxn.pkl'.
+
+    Args:
+        frags1 (list): The half CRUs of the first monomer.
+        frags2 (list): The half CRUs of the second monomer.
+
+    Returns:
+        list: A list of SMILES strings representing 
+        the generated polymer products.
+
+    """
+    params = Chem.MolzipParams()
+    params.label = Chem.MolzipLabel.Isotope
+    prod_Ps = []
+    for frag1, frag2 in itertools.product(frags1, frags2):
+        try:
+            prod_P = Chem.molzip(frag1, frag2, params)
+            Chem.SanitizeMol(prod_P)
+            prod_Ps.append(prod_P)
+        except:
+            pass
+    return [genc_smi(m) for m in prod_Ps]
+
+
 # Copyright (c) 2024 Mitsuru Ohno
 # Use of this source code is governed by a BSD-3-style
 # (license that can be found in the LICENSE file. )
@@ -460,7 +1026,27 @@ def ole_rxnsmarts_gen(reactant):
     return rxn_smarts
 
 
-def ole_cru_gen(m, mon):
+# registry of compiled olefin CRU reactions
+@lru_cache(maxsize=None)
+def smarts2olerxn(s):
+    """
+    Compiles the CRU generation reaction of an olefinic monomer SMARTS
+    (ole_rxnsmarts_gen) once per process.
+
+    Args:
+        s (str): A SMARTS string of an olefinic monomer.
+
+    Returns:
+        rdkit.Chem.rdChemReactions.ChemicalReaction: The initialized
+        reaction.
+
+    """
+    targ_rxn = AllChem.ReactionFromSmarts(ole_rxnsmarts_gen(s))
+    targ_rxn.Initialize()  # need initialization
+    return targ_rxn
+
+
+def ole_cru_gen(m, mon, all_prods=None, ctx=None):
     """
     Generates a CRU from olefinic monomer by applying a reaction
     iteratively until no further reactions are possible.
@@ -468,7 +1054,14 @@ def ole_cru_gen(m, mon):
     Args:
         m (rdkit.Chem.Mol): The input molecule to which
             the reaction will be applied.
-        mon (str): A SMARTS string representing the monomer pattern.
+        mon (str or rdkit.Chem.Mol): A SMARTS string (or compiled 
+            query molecule) representing the monomer pattern.
+        all_prods (bool, optional): Whether to return the SMILES of all
+            products of the last reaction. If False, each reaction
+            generates only the first product, and only its SMILES is
+            returned. Defaults to True.
+        ctx (MatchContext, optional): The match context of `m`, reused
+            for the first search of `mon`. Defaults to None.
     Returns:
         list: A list containing:
             - rdkit.Chem.Mol: The final CRU after all reactions.
@@ -478,23 +1071,35 @@ def ole_cru_gen(m, mon):
         during reaction processing.
 
     """
+    if all_prods is None:
+        all_prods = True
     reactant = [m, ]
-    patt = Chem.MolFromSmarts(mon)
-    targ_rxn = AllChem.ReactionFromSmarts(ole_rxnsmarts_gen(mon))
-    targ_rxn.Initialize()  # need initialization
-    while m.HasSubstructMatch(patt):
-        prod_P = Chem.MolFromSmiles('')
-        prods = targ_rxn.RunReactants(reactant)
+    patt = mon if isinstance(mon, Chem.Mol) else smarts2mol(mon)
+    targ_rxn = smarts2olerxn(get_smarts(mon))
+    prod_Ps = [m, ]
+    found = ctx.has(mon) if ctx is not None else m.HasSubstructMatch(patt)
+    while found:
         prod_Ps = []
-        for prod_P in prods:
+        if not all_prods:
+            # the first product suffices unless it fails to sanitize
+            prods = targ_rxn.RunReactants(reactant, 1)
             try:
-                Chem.SanitizeMol(prod_P[0])
-                prod_P = prod_P[0]
-                prod_Ps.append(prod_P)
+                Chem.SanitizeMol(prods[0][0])
+                prod_Ps.append(prods[0][0])
             except:
                 pass
+        if len(prod_Ps) == 0:
+            prods = targ_rxn.RunReactants(reactant)
+            for prod_P in prods:
+                try:
+                    Chem.SanitizeMol(prod_P[0])
+                    prod_P = prod_P[0]
+                    prod_Ps.append(prod_P)
+                except:
+                    pass
         m = prod_Ps[0]
         reactant = [m, ]
+        found = m.HasSubstructMatch(patt)
     return [m, [genc_smi(m) for m in prod_Ps]]
 
 
@@ -563,20 +1168,24 @@ def diene_14(x, rxn):
 # classify olefinic monomers and generate CRU
 
 
-def ole_sel_cru(m, mons, excls, minFG, maxFG):
+def ole_sel_cru(m, mons, excls, minFG, maxFG, ctx=None):
     """
     Selects and processes a molecule based on specific criteria and 
     generates a SMILES representation.
 
     Args:
         m (rdkit.Chem.Mol): The molecule to be processed.
-        mons (list of str): A list of SMARTS patterns representing
+        mons (list of str or rdkit.Chem.Mol): A list of SMARTS patterns 
+            (or compiled query molecules) representing
             the functional groups to count in the monomer.
-        excls (list of str): A list of SMARTS patterns representing
+        excls (list of str or rdkit.Chem.Mol): A list of SMARTS patterns 
+            (or compiled query molecules) representing
             the exclusion patterns to check against the monomer.
         minFG (int): The minimum number of olefinic polymerizable site
             required.
         maxFG (int): The maximum number of olefinic polymerizable site allowed.
+        ctx (MatchContext, optional): The match context of `m`
+            to reuse. Defaults to None.
 
     Returns:
         list: A list containing:
@@ -585,13 +1194,16 @@ def ole_sel_cru(m, mons, excls, minFG, maxFG):
             - The SMILES representation of the processed molecule (str).
 
     """
-    judge = monomer_sel_pfg(m, mons, excls, minFG, maxFG)
+    if ctx is None:
+        ctx = MatchContext(m)
+    judge = monomer_sel_pfg(m, mons, excls, minFG, maxFG, ctx)
     if judge[0] == True:
         for mon in mons:
-            patt = Chem.MolFromSmarts(mon)
-            if m.HasSubstructMatch(patt):
-                CRU = ole_cru_gen(m, mon)
+            # the matches are valid until the molecule is converted
+            if ctx.has(mon):
+                CRU = ole_cru_gen(m, mon, all_prods=False, ctx=ctx)
                 m = CRU[0]
+                ctx = MatchContext(m)
             else:
                 pass
     else:
@@ -601,6 +1213,69 @@ def ole_sel_cru(m, mons, excls, minFG, maxFG):
     return judge
 
 
+def olecls_mol(m, clsL, minFG, maxFG, screen=None):
+    """
+    Evaluates all olefinic monomer classes against one molecule 
+    in a single call and generates the CRU of each matched class.
+
+    Args:
+        m (rdkit.Chem.Mol): The molecule to be analyzed.
+        clsL (list of tuple): The olefin classes in bit order, each given
+            as (mons, excls) with the monomer and exclusion patterns
+            of the class.
+        minFG (int): The minimum number of olefinic polymerizable site
+            required.
+        maxFG (int): The maximum number of olefinic polymerizable site 
+            allowed.
+        screen (bool, optional): Whether to skip the substructure 
+            searches which can not match by the pattern fingerprints 
+            (screen_patts). The result does not depend on it. 
+            Defaults to False.
+
+    Returns:
+        tuple: A compact result record containing:
+            - mask (int): Bitmask of the classes; bit j is set if
+              the molecule qualifies as a monomer of clsL[j].
+            - counts (tuple of int): The FG count for each class.
+            - crus (tuple of str): The SMILES of the CRU for each class,
+              np.nan for the unmatched classes.
+            - skip (int): Bitmask of the classes skipped by the
+              screening without any substructure search.
+        A molecule that could not be parsed gives 
+        (0, (0, ...), (nan, ...), 0).
+
+    """
+    if screen is None:
+        screen = False
+    mask = 0
+    skip = 0
+    counts = []
+    crus = []
+    if m is None or not pd.notna(m):
+        return (mask, (0, )*len(clsL), (np.nan, )*len(clsL), skip)
+    if screen:
+        mfp = Chem.PatternFingerprint(m)
+    ctx = MatchContext(m)
+    for j, (mons, excls) in enumerate(clsL):
+        if screen:
+            if len(mons) != 0 and minFG > 0 and \
+                    len(screen_patts(mfp, mons)) == 0:
+                # no olefinic site found; it is not a monomer of this class
+                skip |= 1 << j
+                counts.append(0)
+                crus.append(np.nan)
+                continue
+            # the CRU generation runs on the converted molecule,
+            # so only the exclusion patterns are screened.
+            excls = screen_patts(mfp, excls)
+        judge = ole_sel_cru(m, mons, excls, minFG, maxFG, ctx)
+        if judge[0]:
+            mask |= 1 << j
+        counts.append(judge[1])
+        crus.append(judge[2])
+    return (mask, tuple(counts), tuple(crus), skip)
+
+
 def update_nested_dict(row, dict_col, new_val, updated_k):
     """
     Used in the function 'olecls'. If the classification result for 
@@ -639,7 +1314,7 @@ def coord_polym(smi, targ_rxn):
         the products of the reaction.
 
     """
-    prods = targ_rxn.RunReactants([genmol(smi),])
+    prods = targ_rxn.RunReactants([cached_mol(smi),])
     prod_Ps = []
     for prod_P in prods:
         try:
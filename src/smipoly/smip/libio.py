@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) 2021 Mitsuru Ohno
+# Use of this source code is governed by a BSD-3-style
+# license that can be found in the LICENSE file.
+
+"""
+chunked reading and incremental writing of compound and polymer tables
+in CSV or Parquet, used by the streaming entry points of monc.py and
+polg.py.
+
+A CSV output is a single file. A Parquet output is a directory of part
+files (part-00000.parquet, ...), which can be read back at once with
+pd.read_parquet(path). Parquet support requires pyarrow.
+
+The generated polymer libraries of biplym and ole_copolym can also be
+stored in a compact format (write_library), where the SMILES are kept
+once in a dictionary table and referred to by int32 IDs.
+
+"""
+import os
+import json
+import itertools
+import numpy as np
+import pandas as pd
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError('pyarrow is required for the Parquet format. '
+                          'Install it by `pip install pyarrow`.')
+    return pa, pq
+
+
+def get_fmt(path):
+    """
+    Determines the table format from the file extension.
+
+    Args:
+        path (str): Path of the file (or directory of Parquet parts).
+
+    Returns:
+        str: 'parquet' if `path` ends with '.parquet' or '.pq',
+        otherwise 'csv'.
+
+    """
+    if str(path).endswith(('.parquet', '.pq')):
+        return 'parquet'
+    return 'csv'
+
+
+def read_chunks(path, chunksize, skip=0):
+    """
+    Reads a CSV or Parquet table chunk by chunk.
+
+    Args:
+        path (str): Path of the input file, or of a directory of
+            Parquet part files.
+        chunksize (int): Number of rows per chunk.
+        skip (int, optional): Number of leading chunks to skip,
+            e.g. when resuming. Defaults to 0.
+
+    Yields:
+        pd.DataFrame: The chunks in order.
+
+    """
+    if get_fmt(path) == 'csv':
+        for i, chunk in enumerate(pd.read_csv(path, chunksize=chunksize)):
+            if i >= skip:
+                yield chunk
+    else:
+        pa, pq = _import_pyarrow()
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                           if get_fmt(f) == 'parquet')
+        else:
+            files = [path]
+        i = 0
+        for f in files:
+            for batch in pq.ParquetFile(f).iter_batches(batch_size=chunksize):
+                if i >= skip:
+                    yield batch.to_pandas()
+                i += 1
+
+
+class TableWriter:
+    """
+    Appends DataFrames to a CSV file or to a directory of Parquet parts.
+    The writer state returned by `write` can be stored in a checkpoint and
+    passed back as `state` to resume after the last finished chunk.
+
+    Args:
+        path (str): Path of the output CSV file or Parquet directory.
+        fmt (str, optional): 'csv' or 'parquet'. Defaults to the format
+            given by the extension of `path`.
+        state (dict, optional): The writer state of an earlier run.
+            Anything written after that state is discarded.
+            Defaults to None (start a new output,
+            overwriting an existing one).
+
+    """
+
+    def __init__(self, path, fmt=None, state=None):
+        self.path = str(path)
+        self.fmt = fmt if fmt is not None else get_fmt(path)
+        self.state = state if state is not None else {'parts': 0, 'offset': 0}
+        self.schema = None
+        if self.fmt == 'csv':
+            if state is None:
+                open(self.path, 'w').close()
+            else:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(self.state['offset'])
+        else:
+            pa, pq = _import_pyarrow()
+            os.makedirs(self.path, exist_ok=True)
+            for f in os.listdir(self.path):
+                if get_fmt(f) == 'parquet':
+                    if int(f[5:10]) >= self.state['parts']:
+                        os.remove(os.path.join(self.path, f))
+            if self.state['parts'] > 0:
+                self.schema = pq.read_schema(self._part(0))
+
+    def _part(self, i):
+        return os.path.join(self.path, 'part-{:05d}.parquet'.format(i))
+
+    def write(self, df):
+        """
+        Appends a DataFrame to the output.
+
+        Args:
+            df (pd.DataFrame): The rows to append. Must have the same
+                columns as the earlier chunks.
+
+        Returns:
+            dict: The writer state after this chunk.
+
+        """
+        if self.fmt == 'csv':
+            with open(self.path, 'a', newline='') as f:
+                df.to_csv(f, header=self.state['offset'] == 0, index=False)
+                offset = f.tell()
+        else:
+            pa, pq = _import_pyarrow()
+            if self.schema is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self.schema = table.schema
+            else:
+                table = pa.Table.from_pandas(
+                    df, schema=self.schema, preserve_index=False)
+            pq.write_table(table, self._part(self.state['parts']))
+            offset = 0
+        self.state = {'parts': self.state['parts'] + 1, 'offset': offset}
+        return self.state
+
+
+def load_ckpt(path):
+    """
+    Loads a checkpoint written by save_ckpt.
+
+    Args:
+        path (str): Path of the checkpoint file.
+
+    Returns:
+        dict or None: The checkpoint, or None if there is none.
+
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_ckpt(path, ckpt):
+    """
+    Atomically writes a checkpoint, so that a killed job leaves either
+    the previous or the new checkpoint.
+
+    Args:
+        path (str): Path of the checkpoint file.
+        ckpt (dict): JSON serializable checkpoint.
+
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(ckpt, f)
+    os.replace(tmp, path)
+
+
+def _split(codes, lens):
+    # split a flat array of codes into lists of the given lengths
+    return [e.tolist() for e in np.split(codes, np.cumsum(lens)[:-1])]
+
+
+def encode_library(df):
+    """
+    Encodes a polymer library given by biplym or ole_copolym into
+    the compact format. All SMILES of the monomers and polymers are
+    collected in a dictionary table and replaced by their int32 IDs
+    ('' by -1).
+
+    Args:
+        df (pd.DataFrame): The output of biplym or ole_copolym.
+
+    Returns:
+        tuple: The dictionary table (pd.DataFrame with the columns 'id'
+        and 'smiles') and the encoded library (pd.DataFrame).
+        For biplym, the encoded library has the int32 columns 'mon1',
+        'mon2' and 'polym', the categorical 'polymer_class' and the
+        int32 'Ps_rxnL'; 'reactset' is dropped, as it is given by
+        'mon1' and 'mon2'. For ole_copolym, 'polym' and 'reactset'
+        are lists of int32 IDs and 'mon1' and 'mon2' are dropped.
+
+    """
+    copoly = len(df) != 0 and not isinstance(df['polym'].iloc[0], str)
+    if copoly:
+        vals = itertools.chain(itertools.chain.from_iterable(df['polym']),
+                               itertools.chain.from_iterable(df['reactset']))
+    else:
+        vals = itertools.chain(df['mon1'], df['mon2'], df['polym'])
+    smis = pd.Index(pd.unique(np.array([v for v in vals if v != ''],
+                                       dtype=object)))
+    DF_smi = pd.DataFrame({'id': np.arange(len(smis), dtype=np.int32),
+                           'smiles': np.asarray(smis, dtype=object)})
+
+    def enc(vals):
+        return smis.get_indexer(np.asarray(vals, dtype=object)).astype(np.int32)
+
+    if copoly:
+        DF_enc = pd.DataFrame({
+            'polym': _split(enc(list(itertools.chain.from_iterable(
+                df['polym']))), df['polym'].str.len()),
+            'polymer_class': df['polymer_class'].to_list(),
+            'Ps_rxnL': df['Ps_rxnL'].to_list(),
+            'reactset': _split(enc(list(itertools.chain.from_iterable(
+                df['reactset']))), df['reactset'].str.len())})
+    else:
+        DF_enc = pd.DataFrame({
+            'mon1': enc(df['mon1']),
+            'mon2': enc(df['mon2']),
+            'polym': enc(df['polym']),
+            'polymer_class': df['polymer_class'].astype('category'),
+            'Ps_rxnL': df['Ps_rxnL'].astype(np.int32)})
+    return DF_smi, DF_enc
+
+
+def decode_library(DF_smi, DF_enc):
+    """
+    Decodes a polymer library in the compact format back into
+    the DataFrame given by biplym or ole_copolym.
+
+    Args:
+        DF_smi (pd.DataFrame): The dictionary table of encode_library.
+        DF_enc (pd.DataFrame): The encoded library of encode_library.
+
+    Returns:
+        pd.DataFrame: The library with the columns 'mon1', 'mon2',
+        'polym', 'polymer_class', 'Ps_rxnL' and 'reactset'.
+
+    """
+    # the last element is given to the ID -1
+    lut = np.empty(len(DF_smi) + 1, dtype=object)
+    lut[DF_smi['id'].to_numpy()] = DF_smi['smiles'].to_numpy()
+    lut[-1] = ''
+
+    if 'mon1' in DF_enc.columns:
+        DF = pd.DataFrame({
+            'mon1': lut[DF_enc['mon1'].to_numpy()],
+            'mon2': lut[DF_enc['mon2'].to_numpy()],
+            'polym': lut[DF_enc['polym'].to_numpy()],
+            'polymer_class': DF_enc['polymer_class'].astype(str).to_numpy(),
+            'Ps_rxnL': DF_enc['Ps_rxnL'].astype(int).to_numpy()})
+        DF['reactset'] = [tuple(sorted({m1, m2}))
+                          for m1, m2 in zip(DF['mon1'], DF['mon2'])]
+    else:
+        DF = pd.DataFrame({
+            'mon1': '',
+            'mon2': '',
+            'polym': [lut[np.asarray(e, dtype=int)].tolist()
+                      for e in DF_enc['polym']],
+            'polymer_class': [list(e) for e in DF_enc['polymer_class']],
+            'Ps_rxnL': [e if np.isscalar(e) or e is None else list(e)
+                        for e in DF_enc['Ps_rxnL']],
+            'reactset': [lut[np.asarray(e, dtype=int)].tolist()
+                         for e in DF_enc['reactset']]},
+            index=DF_enc.index)
+    return DF
+
+
+def write_library(df, path):
+    """
+    Writes a polymer library in the compact format to a directory of
+    two Parquet files, 'smiles.parquet' (the dictionary table) and
+    'polymers.parquet' (the encoded library), with dictionary encoding
+    of the repeated values.
+
+    Args:
+        df (pd.DataFrame): The output of biplym or ole_copolym.
+        path (str): The output directory.
+
+    """
+    pa, pq = _import_pyarrow()
+    DF_smi, DF_enc = encode_library(df)
+    os.makedirs(path, exist_ok=True)
+    for fnam, DF in [('smiles.parquet', DF_smi),
+                     ('polymers.parquet', DF_enc)]:
+        pq.write_table(pa.Table.from_pandas(DF, preserve_index=False),
+                       os.path.join(path, fnam), use_dictionary=True)
+
+
+def read_library(path, decode=True):
+    """
+    Reads a polymer library written by write_library.
+
+    Args:
+        path (str): The directory given to write_library.
+        decode (bool, optional): Whether to decode the library
+            (decode_library). Defaults to True.
+
+    Returns:
+        pd.DataFrame or tuple: The decoded library, or the dictionary
+        table and the encoded library if `decode` is False.
+
+    """
+    pa, pq = _import_pyarrow()
+    DF_smi = pq.read_table(os.path.join(path, 'smiles.parquet')).to_pandas()
+    DF_enc = pq.read_table(os.path.join(path, 'polymers.parquet')).to_pandas()
+    if decode:
+        return decode_library(DF_smi, DF_enc)
+    return DF_smi, DF_enc
+
+# end
@@ -17,43 +17,113 @@ to the DataFrame. It also supports optional
 display of classification results.
 
 """
-import os
-from pathlib import Path
-import json
-import pickle
 import numpy as np
 import pandas as pd
 # from rdkit import rdBase, Chem
 # from rdkit.Chem import AllChem, Draw
 from .funclib import (
-    genmol,
+    cached_mol,
     genc_smi,
-    monomer_sel_mfg,
-    monomer_sel_pfg,
-    ole_sel_cru,
-    diene_14, update_nested_dict
+    moncls_mol,
+    olecls_mol,
+    diene_14,
+    run_chunks
 )
+from .libio import read_chunks, TableWriter, load_ckpt, save_ckpt
+from .rules import rules, rule_names, db_file
+from .profiling import stage
 
-db_file = os.path.join(str(Path(__file__).resolve().parent.parent), 'rules')
-with open(os.path.join(db_file, 'mon_vals.json'), 'r') as f:
-    mon_vals = json.load(f)
-with open(os.path.join(db_file, 'mon_dic.json'), 'r') as f:
-    mon_dic = json.load(f)
-with open(os.path.join(db_file, 'mon_dic_inv.json'), 'r') as f:
-    mon_dic_inv = json.load(f)
-with open(os.path.join(db_file, 'mon_lst.json'), 'r') as f:
-    monL = json.load(f)
-with open(os.path.join(db_file, 'excl_lst.json'), 'r') as f:
-    exclL = json.load(f)
-with open(os.path.join(db_file, 'ps_rxn.pkl'), 'rb') as f:
-    Ps_rxnL = pickle.load(f)
-
-monLg = {int(k): v for k, v in monL.items()}
-exclLg = {int(k): v for k, v in exclL.items()}
-mon_dic_inv = {int(k): v for k, v in mon_dic_inv.items()}
-
-
-def moncls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None):
+
+def __getattr__(name):
+    # the rules (mon_vals, monLg, Ps_rxnL, ...) are loaded on first access
+    if name in rule_names:
+        return getattr(rules, name)
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def init_worker():
+    """
+    Initializer of the worker processes used by moncls and olecls 
+    with n_jobs > 1. Loads the classification rules once per worker.
+
+    """
+    rules.monLq
+    rules.exclLq
+    rules.Ps_rxnL
+
+
+def moncls_chunk(smis, minFG, maxFG, screen=None):
+    """
+    Classifies a chunk of SMILES strings into the monomer classes. 
+    Used by moncls, either in the calling process or in a worker process.
+
+    Args:
+        smis (pd.Series): SMILES strings of the chunk.
+        minFG (int): Minimum number of functional groups 
+            for poly-functionalized monomers.
+        maxFG (int): Maximum number of functional groups 
+            for poly-functionalized monomers.
+        screen (bool, optional): Whether to screen the substructure 
+            searches by pattern fingerprints. Defaults to False.
+
+    Returns:
+        pd.DataFrame: A DataFrame with the index of `smis` and 
+        the columns 'smip_cand_mons', one boolean column per 
+        monomer class and 'prefilter_skip', the bitmask of 
+        the classes skipped by the screening.
+
+    """
+    mon_vals = rules.mon_vals
+    mon_dic_inv = rules.mon_dic_inv
+    monL = {k: v for k, v in rules.monLq.items(
+    ) if k in mon_vals[0]+mon_vals[1]+mon_vals[2]}
+    exclL = {k: v for k, v in rules.exclLq.items(
+    ) if k in mon_vals[0]+mon_vals[1]+mon_vals[2]}
+
+    # the monomer classes in bit order of the result record
+    clsL = [(monL[i], list(exclL[i]), False) for i in mon_vals[0]]
+    clsL += [(monL[i], exclL[i], True) for i in mon_vals[1]]
+
+    DF02 = pd.DataFrame(index=smis.index)
+    # drop NA of smiles, and add chemical structure
+    with stage('moncls.parse', rows=len(smis)):
+        ROMol = smis.apply(cached_mol)
+        DF02['smip_cand_mons'] = ROMol.apply(genc_smi)
+
+    # classification for mono- and poly-functionalized monomer
+    # in a single pass over the molecules.
+    with stage('moncls.match', rows=len(smis)):
+        rsl = [moncls_mol(m, clsL, minFG, maxFG, screen) for m in ROMol]
+    masks = np.array([r[0] for r in rsl], dtype=np.int64)
+    for j, i in enumerate(mon_vals[0]+mon_vals[1]):
+        DF02[mon_dic_inv[i]] = (masks >> j) & 1 == 1
+    DF02['prefilter_skip'] = np.array([r[2] for r in rsl], dtype=np.int64)
+    return DF02
+
+
+def screen_report(skips, keys):
+    """
+    Summarizes the skip bitmasks of the pattern fingerprint screening.
+
+    Args:
+        skips (pd.Series): The 'prefilter_skip' bitmasks of the chunk 
+            functions.
+        keys (list of str): The class names in bit order.
+
+    Returns:
+        dict: The ratio of the compounds whose classification was 
+        skipped by the screening, for each class.
+
+    """
+    skips = np.asarray(skips, dtype=np.int64)
+    return {
+        k: float(np.mean((skips >> j) & 1)) if len(skips) else 0.0
+        for j, k in enumerate(keys)}
+
+
+def moncls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None,
+           n_jobs=None, chunksize=None, screen=None, store=None):
     """
     Select monomers from given dataset of small molecule compounds and 
     categolize them into a monomer class. 
@@ -68,10 +138,25 @@ def moncls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None):
             for poly-functionalized monomers. Defaults to 4.
         dsp_rsl (bool, optional): Whether to display classification 
             results. Defaults to False.
+        n_jobs (int, optional): Number of worker processes. 
+            -1 uses all CPUs. Defaults to 1 (no worker process).
+        chunksize (int, optional): Number of SMILES per chunk sent to 
+            a worker process. Defaults to splitting the input into 
+            4 chunks per worker.
+        screen (bool, optional): Whether to skip the substructure 
+            searches which can not match, judged from the pattern 
+            fingerprints. It pays off when most of the compounds 
+            match none of the classes. Defaults to False.
+        store (ClassStore, optional): Store of the classification 
+            results (clsstore.py). Only the compounds not in the store 
+            are classified, and their results are added to it. 
+            Defaults to None.
 
     Returns:
         pd.DataFrame: A modified DataFrame with classification 
-        results appended.
+        results appended. The ratio of the compounds skipped by 
+        the screening for each class is given in 
+        `DataFrame.attrs['prefilter']`.
 
     Raises:
         ValueError: If the specified SMILES column name is invalid.
@@ -79,6 +164,8 @@ def moncls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None):
     Notes:
         - The function appends additional rows for carbonate
           structures.
+        - The result does not depend on `n_jobs`, `chunksize` and 
+          `screen`.
 
     """
     # #The default number of the samle class of FG were limited
@@ -90,11 +177,8 @@ def moncls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None):
         maxFG = 4
     if dsp_rsl is None:
         dsp_rsl = False
-
-    monL = {k: v for k, v in monLg.items(
-    ) if k in mon_vals[0]+mon_vals[1]+mon_vals[2]}
-    exclL = {k: v for k, v in exclLg.items(
-    ) if k in mon_vals[0]+mon_vals[1]+mon_vals[2]}
+    mon_vals = rules.mon_vals
+    mon_dic_inv = rules.mon_dic_inv
 
     # read source file
     DF01 = df
@@ -109,50 +193,173 @@ def moncls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None):
     else:
         print("invalid SMILES column name")
 
-    # drop NA of smiles, and add chemical structure
-    DF02['ROMol'] = DF02[smiColn].apply(genmol)
-    DF02['smip_cand_mons'] = DF02['ROMol'].apply(genc_smi)
-
-    # classification for mono-functionalized monomer
-    # count functional groupe, remove exclude compounds andjudge
-    # targetted monomer or not.
-    for i in mon_vals[0]:
-        mons = ()
-        excls = ()
-        mons = monL[i]
-        excls = list(exclL[i])
-        DF02[mon_dic_inv[i]] = [e[0]
-                                for e in DF02['ROMol'].apply(
-                                    monomer_sel_mfg, mons=mons,
-                                    excls=excls)]
-        if dsp_rsl:
+    def classify(smis):
+        return run_chunks(
+            moncls_chunk, smis, n_jobs=n_jobs, chunksize=chunksize,
+            initializer=init_worker, args=(minFG, maxFG, screen))
+    if store is None:
+        DF_cls = classify(DF02[smiColn])
+    else:
+        DF_cls = store.classify(classify, DF02[smiColn], 'moncls',
+                                (minFG, maxFG))
+    prefilter = screen_report(
+        DF_cls.pop('prefilter_skip'),
+        [mon_dic_inv[i] for i in mon_vals[0]+mon_vals[1]])
+    DF02 = pd.concat([DF02, DF_cls], axis=1)  # 2024/01 modified
+    DF02.attrs['prefilter'] = prefilter
+
+    if dsp_rsl:
+        for i in mon_vals[0]+mon_vals[1]:
             print(i)
             print(mon_dic_inv[i], ' = ', len(
                 DF02[DF02[mon_dic_inv[i]] == True]), ' / ', len(DF02))
-        else:
-            pass
-
-    # classification for poly-functionalized monomer
-    for i in mon_vals[1]:
-        mons = ()
-        excls = ()
-        mons = monL[i]
-        excls = exclL[i]
-        DF02[mon_dic_inv[i]] = [
-            e[0] for e in DF02['ROMol'].apply(
-                monomer_sel_pfg, mons=mons, excls=excls,
-                minFG=minFG, maxFG=maxFG
-            )
-        ]
+            if screen:
+                print('prefilter skip ratio = ',
+                      format(prefilter[mon_dic_inv[i]], '.3f'))
+    else:
+        pass
+    return DF02
+
+
+def moncls_stream(path_in, path_out, smiColn, chunksize=None,
+                  minFG=None, maxFG=None, dsp_rsl=None, n_jobs=None):
+    """
+    Streaming version of moncls. Reads the input table chunk by chunk,
+    classifies each chunk and appends the results to the output table,
+    so that the memory usage is bounded by `chunksize` regardless of
+    the input size. A checkpoint ('<path_out>.ckpt') is updated after
+    every finished chunk; calling the function again with the same
+    arguments resumes a killed job from the last finished chunk.
+
+    Args:
+        path_in (str): Input CSV file, or Parquet file (or directory of
+            Parquet parts) if the extension is '.parquet'.
+        path_out (str): Output CSV file, or directory of Parquet parts
+            if the extension is '.parquet'.
+        smiColn (str): Column name containing SMILES strings.
+        chunksize (int, optional): Number of rows per chunk.
+            Defaults to 100000.
+        minFG (int, optional): Minimum number of functional groups
+            for poly-functionalized monomers. Defaults to 2.
+        maxFG (int, optional): Maximum number of functional groups
+            for poly-functionalized monomers. Defaults to 4.
+        dsp_rsl (bool, optional): Whether to display the progress.
+            Defaults to False.
+        n_jobs (int, optional): Number of worker processes used for
+            each chunk. Defaults to 1.
+
+    Returns:
+        int: Number of rows written to the output.
+
+    Notes:
+        - The output holds the same rows and columns as moncls
+          (including the appended CO and HCHO rows), without
+          the index.
+        - Delete the checkpoint to start over from the beginning.
+
+    """
+    if chunksize is None:
+        chunksize = 100000
+    if minFG is None:
+        minFG = 2
+    if maxFG is None:
+        maxFG = 4
+    if dsp_rsl is None:
+        dsp_rsl = False
+
+    ckpt_file = str(path_out) + '.ckpt'
+    ckpt = load_ckpt(ckpt_file)
+    if ckpt is None:
+        ckpt = {'chunks': 0, 'rows': 0, 'columns': None,
+                'writer': None, 'done': False}
+    elif ckpt['done']:
         if dsp_rsl:
-            print(i)
-            print(mon_dic_inv[i], ' = ', len(
-                DF02[DF02[mon_dic_inv[i]] == True]), ' / ', len(DF02))
-        else:
-            pass
+            print('already finished: ', path_out)
+        return ckpt['rows']
+    elif dsp_rsl:
+        print('resume from chunk ', ckpt['chunks'])
+    writer = TableWriter(path_out, state=ckpt['writer'])
+
+    def classify(DF01):
+        DF_cls = run_chunks(
+            moncls_chunk, DF01[smiColn], n_jobs=n_jobs, chunksize=None,
+            initializer=init_worker, args=(minFG, maxFG))
+        DF_cls = DF_cls.drop('prefilter_skip', axis=1)
+        DF02 = pd.concat([DF01, DF_cls], axis=1)
+        ckpt['writer'] = writer.write(DF02)
+        ckpt['rows'] += len(DF02)
+        save_ckpt(ckpt_file, ckpt)
+
+    for DF01 in read_chunks(path_in, chunksize, skip=ckpt['chunks']):
+        if smiColn not in DF01.columns:
+            print("invalid SMILES column name")
+            return
+        ckpt['chunks'] += 1
+        ckpt['columns'] = list(DF01.columns)
+        classify(DF01)
+        if dsp_rsl:
+            print('chunk ', ckpt['chunks'], ': ', ckpt['rows'], ' rows')
 
-    DF02 = DF02.drop('ROMol', axis=1)  # 2024/01 modified
-    return DF02
+    # append CO and HCHO for carbonate
+    DFadd = pd.DataFrame([['[C-]#[O+]'], ['C=O'], ], columns=[smiColn])
+    DFadd = DFadd.reindex(columns=ckpt['columns'] or [smiColn])
+    ckpt['done'] = True
+    classify(DFadd)
+    return ckpt['rows']
+
+
+def olecls_chunk(smis, minFG, maxFG, screen=None):
+    """
+    Classifies a chunk of SMILES strings into the olefinic monomer 
+    classes. Used by olecls, either in the calling process or 
+    in a worker process.
+
+    Args:
+        smis (pd.Series): SMILES strings of the chunk.
+        minFG (int): Minimum number of functional groups to consider.
+        maxFG (int): Maximum number of functional groups to consider.
+        screen (bool, optional): Whether to screen the substructure 
+            searches by pattern fingerprints. Defaults to False.
+
+    Returns:
+        pd.DataFrame: A DataFrame with the index of `smis` and 
+        the columns 'smip_cand_mons', 'ole_cls' and 'prefilter_skip', 
+        the bitmask of the classes skipped by the screening.
+
+    """
+    mon_vals = rules.mon_vals
+    mon_dic_inv = rules.mon_dic_inv
+    monL = {k: v for k, v in rules.monLq.items() if k in mon_vals[3]}
+    exclL = {k: v for k, v in rules.exclLq.items() if k in mon_vals[3]}
+
+    template_ole_keys = [mon_dic_inv[i] for i in mon_vals[3]]
+
+    # the olefin classes in bit order of the result record
+    clsL = [(monL[i], list(exclL[i])) for i in mon_vals[3]]
+
+    # drop NA of smiles, and add chemical structure
+    with stage('olecls.parse', rows=len(smis)):
+        ROMol = smis.apply(cached_mol)
+
+    # classification for olefinic monomer in a single pass
+    # over the molecules.
+    ole_clsL = []
+    skips = []
+    with stage('olecls.match', rows=len(smis)):
+        for m in ROMol:
+            mask, counts, crus, skip = olecls_mol(
+                m, clsL, minFG, maxFG, screen)
+            skips.append(skip)
+            ole_clsL.append({
+                k: [mask >> j & 1 == 1, counts[j], crus[j]]
+                for j, k in enumerate(template_ole_keys)})
+
+    DF_cls = pd.DataFrame(index=smis.index)
+    DF_cls['smip_cand_mons'] = ROMol.apply(genc_smi)
+    DF_cls['ole_cls'] = pd.Series(ole_clsL, index=smis.index).apply(
+        diene_14, rxn=rules.Ps_rxnL[209])  # refine conjugated diene CRU
+    DF_cls['prefilter_skip'] = np.array(skips, dtype=np.int64)
+    return DF_cls
 
 
 # classification for olefinic monomer
@@ -160,7 +367,8 @@ def moncls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None):
 # monomer or not.
 
 
-def olecls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None):
+def olecls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None,
+           n_jobs=None, chunksize=None, screen=None, store=None):
     """
     Select olefinic monomers from given dataset of small molecule 
     compounds and categolize them into a olefinic monomer class. 
@@ -176,22 +384,38 @@ def olecls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None):
             to consider. Defaults to 4.
         dsp_rsl (bool, optional): Whether to display results 
             during processing. Defaults to False.
+        n_jobs (int, optional): Number of worker processes. 
+            -1 uses all CPUs. Defaults to 1 (no worker process).
+        chunksize (int, optional): Number of SMILES per chunk sent to 
+            a worker process. Defaults to splitting the input into 
+            4 chunks per worker.
+        screen (bool, optional): Whether to skip the substructure 
+            searches which can not match, judged from the pattern 
+            fingerprints. It pays off when most of the compounds 
+            match none of the classes. Defaults to False.
+        store (ClassStore, optional): Store of the classification 
+            results (clsstore.py). Only the compounds not in the store 
+            are classified, and their results are added to it. 
+            Defaults to None.
 
     Returns:
         pd.DataFrame: The updated DataFrame with olefin classification 
-        results.
+        results. The ratio of the compounds skipped by the screening 
+        for each class is given in `DataFrame.attrs['prefilter']`.
 
     Notes:
-        - The function assumes the existence of several global
-          variables such as `monLg`, `exclLg`,
-          `mon_vals`, `mon_dic_inv`, and `Ps_rxnL`.
+        - The function uses the rules `monLq`, `exclLq`,
+          `mon_vals`, `mon_dic_inv`, and `Ps_rxnL` of the shared
+          rules object (rules.py), loaded on the first call.
         - The function modifies the input DataFrame by adding
           new columns for olefin classification.
-        - The `genmol`, `genc_smi`, `ole_sel_cru`,
+        - The `cached_mol`, `genc_smi`, `ole_sel_cru`,
           `update_nested_dict` and `diene_14` functions
           are defined in 'funclib.py'.
         - The `ole_cls` column is refined for conjugated
           diene classification using a specific reaction.
+        - The result does not depend on `n_jobs`, `chunksize` and 
+          `screen`.
 
     """
     if minFG is None:
@@ -200,9 +424,8 @@ def olecls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None):
         maxFG = 4
     if dsp_rsl is None:
         dsp_rsl = False
-
-    monL = {k: v for k, v in monLg.items() if k in mon_vals[3]}
-    exclL = {k: v for k, v in exclLg.items() if k in mon_vals[3]}
+    mon_vals = rules.mon_vals
+    mon_dic_inv = rules.mon_dic_inv
 
     template_ole_keys = [mon_dic_inv[i] for i in mon_vals[3]]
     print(template_ole_keys)
@@ -210,43 +433,31 @@ def olecls(df, smiColn, minFG=None, maxFG=None, dsp_rsl=None):
     # read source file
     DF02 = df
     smiColn = smiColn
-    # drop NA of smiles, and add chemical structure
-    DF02['ROMol'] = DF02[smiColn].apply(genmol)
-    DF02['smip_cand_mons'] = DF02['ROMol'].apply(genc_smi)
-    # create null column for olefin classification
-    DF02['ole_cls'] = [
-        {
-            k: v for k, v in zip(
-                template_ole_keys, [
-                    np.nan for x in range(len(template_ole_keys))]
-            )
-        }
-        for y in range(len(DF02))
-    ]
-
-    for i in mon_vals[3]:
-        mons = ()
-        excls = ()
-        mons = monL[i]
-        excls = list(exclL[i])
-        DF02['temp'] = ['' for e in range(len(DF02))]
-        DF02['temp'] = DF02['ROMol'].apply(
-            ole_sel_cru, mons=mons, excls=excls, minFG=minFG, maxFG=maxFG)
-        DF02 = DF02.apply(update_nested_dict, axis=1, args=(
-            'ole_cls', 'temp', mon_dic_inv[i]))
-
-        if dsp_rsl:
-            print(mon_dic_inv[i], ' = ',
+    def classify(smis):
+        return run_chunks(
+            olecls_chunk, smis, n_jobs=n_jobs, chunksize=chunksize,
+            initializer=init_worker, args=(minFG, maxFG, screen))
+    if store is None:
+        DF_cls = classify(DF02[smiColn])
+    else:
+        DF_cls = store.classify(classify, DF02[smiColn], 'olecls',
+                                (minFG, maxFG))
+    prefilter = screen_report(DF_cls['prefilter_skip'], template_ole_keys)
+    DF02['smip_cand_mons'] = DF_cls['smip_cand_mons']
+    DF02['ole_cls'] = DF_cls['ole_cls']
+
+    if dsp_rsl:
+        for k in template_ole_keys:
+            print(k, ' = ',
                   list(DF02['ole_cls'].apply(
-                      lambda x: x[mon_dic_inv[i]][0] == True)).count(True),
+                      lambda x: x[k][0] == True)).count(True),
                   ' / ', len(DF02))
-
-        else:
-            pass
-    DF02['ole_cls'] = df['ole_cls'].apply(
-        diene_14, rxn=Ps_rxnL[209])  # refine conjugated diene CRU
-    DF02 = DF02.drop('ROMol', axis=1)
-    DF02 = DF02.drop('temp', axis=1)
+            if screen:
+                print('prefilter skip ratio = ', format(prefilter[k], '.3f'))
+    else:
+        pass
+    DF02 = DF02.copy()
+    DF02.attrs['prefilter'] = prefilter
     return DF02
 
 # end
@@ -10,94 +10,257 @@
 polymer generator from classfied monomers.
 
 """
-import os
 import warnings  # for warning
-from pathlib import Path
 import itertools
+import collections
+import math
+from functools import lru_cache
 import numpy as np
 import pandas as pd
-import json
-import pickle
 from rdkit import Chem  # remove rdBase
 from rdkit.Chem import AllChem
 from .funclib import (
-    genmol,
+    cached_mol,
     coord_polym,
     bipolymA,
-    homopolymA
+    bipolymF,
+    half_cru,
+    homopolymA,
+    run_chunks
 )
+from .libio import TableWriter
+from .rules import rules, rule_names, db_file
+from .profiling import stage, record
 
 
-db_file = os.path.join(str(Path(__file__).resolve().parent.parent), 'rules')
-with open(os.path.join(db_file, 'mon_vals.json'), 'r') as f:
-    mon_vals = json.load(f)
-with open(os.path.join(db_file, 'mon_dic.json'), 'r') as f:
-    mon_dic = json.load(f)
-with open(os.path.join(db_file, 'mon_dic_inv.json'), 'r') as f:
-    mon_dic_inv = json.load(f)
-with open(os.path.join(db_file, 'mon_lst.json'), 'r') as f:
-    monL = json.load(f)
-with open(os.path.join(db_file, 'excl_lst.json'), 'r') as f:
-    exclL = json.load(f)
-with open(os.path.join(db_file, 'ps_rxn.pkl'), 'rb') as f:
-    Ps_rxnL = pickle.load(f)
-with open(os.path.join(db_file, 'ps_class.json'), 'r') as f:
-    Ps_classL = json.load(f)
-with open(os.path.join(db_file, 'ps_gen.pkl'), 'rb') as f:
-    Ps_GenL = pickle.load(f)
+def __getattr__(name):
+    # the rules (Ps_rxnL, Ps_GenL, ...) are loaded on first access
+    if name in rule_names:
+        return getattr(rules, name)
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name))
 
-monLg = {int(k): v for k, v in monL.items()}
-exclLg = {int(k): v for k, v in exclL.items()}
-mon_dic_inv = {int(k): v for k, v in mon_dic_inv.items()}
 
+def init_worker():
+    """
+    Initializer of the worker processes used by biplym
+    with n_jobs > 1. Loads the generation rules once per worker.
 
-def biplym(df, targ=None, dsp_rsl=None):
     """
-    Generates polymers based on the input DataFrame and 
-    specified target polymer classes.
+    rules.monLq
+    rules.exclLq
+    rules.Ps_rxnL
+    rules.Ps_GenL
+
+
+ENGINES = ['reaction', 'fragment']
+
+
+def seq_monL():
+    # FOR FUTURE WORKS!! temporary reduced the dictionaly on 04/21/2004
+    mon_vals = rules.mon_vals
+    return {k: v for k, v in rules.monLg.items(
+    ) if k in mon_vals[0]+mon_vals[1]+mon_vals[2]}
+
+
+@lru_cache(maxsize=2**16)
+def half_frags(smi, P_class, i, s):
+    """
+    Returns the half CRUs (half_cru) of a monomer for the s-th reactant
+    of the i-th polymer set of `Ps_GenL[P_class]`, generated once per
+    process.
 
     Args:
-        df (pd.DataFrame): Input DataFrame containing monomer information.
-            Must include a column named 'smip_cand_mons'.
-        targ (list, optional): List of targetted polymer classes to 
-            generate. Defaults to ['all', ] to include all available
-            classes. Use ['exc_ole'] to exclude polyolefins.
-        dsp_rsl (bool, optional): Whether to display the results summary.
-            Defaults to False.
+        smi (str): Canonical SMILES of the monomer.
+        P_class (str): The polymer class.
+        i (int): Index of the polymer set in `Ps_GenL[P_class]`.
+        s (int): Index of the reactant, 0 (mon1) or 1 (mon2).
 
     Returns:
-        pd.DataFrame: A DataFrame containing the generated polymers 
-        with the following columns:
-            - 'mon1': First monomer.
-            - 'mon2': Second monomer (if applicable).
-            - 'polym': Generated polymer.
-            - 'polymer_class': Class of the polymer.
-            - 'Ps_rxnL': Reaction key for the polymerization.
+        tuple: The half CRUs (rdkit.Chem.Mol).
 
-    Notes:
-        - The function filters and processes the input DataFrame
-          to identify valid monomers.
-        - Polymers are generated based on predefined polymerization rules
-          and target classes.
-        - Duplicate polymerization reactions are removed,
-          and the resulting DataFrame is adjusted.
-        - If `dsp_rsl` is True, the function prints the number
-          of polymerization reactions and generated polymers.
+    """
+    return tuple(half_cru(cached_mol(smi), rules.Ps_GenH[P_class][i][s],
+                          monL=seq_monL(), Ps_rxnL=rules.Ps_rxnL,
+                          P_class=P_class))
 
-    Raises:
-        ValueError: If an invalid polymer class is specified in `targ`.
 
+def polym_chunk(pairs, P_class, i, engine=None):
     """
-    if targ == None:
-        targ = ['all', ]
-    if dsp_rsl == None:
-        dsp_rsl = False
+    Generates the polymers of a chunk of monomer pairs with
+    the i-th polymer set of `Ps_GenL[P_class]`. Run in the calling
+    process or in a worker process by run_chunks.
 
-    # FOR FUTURE WORKS!! temporary reduced the dictionaly on 04/21/2004
-    monL = {k: v for k, v in monLg.items(
-    ) if k in mon_vals[0]+mon_vals[1]+mon_vals[2]}
-    exclL = {k: v for k, v in exclLg.items(
-    ) if k in mon_vals[0]+mon_vals[1]+mon_vals[2]}
+    Args:
+        pairs (pd.Series): (mon1, mon2) tuples of canonical SMILES.
+            mon2 is '' for a homopolymerization.
+        P_class (str): The polymer class.
+        i (int): Index of the polymer set in `Ps_GenL[P_class]`.
+        engine (str, optional): 'reaction' to run the reaction for each
+            pair (bipolymA), or 'fragment' to join the half CRUs of
+            the monomers generated once per monomer (bipolymF).
+            Homopolymerizations and the reactions which can not be split 
+            (half_rxns) always run as 'reaction'. Defaults to 'reaction'.
+
+    Returns:
+        pd.Series: The lists of generated CRU SMILES with the index
+        of `pairs`.
+
+    """
+    if engine is None:
+        engine = 'reaction'
+    mon_dic = rules.mon_dic
+    Ps_rxnL = rules.Ps_rxnL
+    P_set = rules.Ps_GenL[str(P_class)][i]
+    monL = seq_monL()
+
+    targ_mon1 = P_set[0]
+    if P_set[1] != 'none' and engine == 'fragment' and \
+            rules.Ps_GenH[P_class][i] is not None:
+        prods = [bipolymF(half_frags(m1, P_class, i, 0),
+                          half_frags(m2, P_class, i, 1))
+                 for m1, m2 in pairs]
+    elif P_set[1] != 'none':
+        prods = [bipolymA([cached_mol(m1), cached_mol(m2)],
+                          targ_rxn=P_set[2], monL=monL,
+                          Ps_rxnL=Ps_rxnL, P_class=P_class)
+                 for m1, m2 in pairs]
+    else:
+        mons = rules.monLq[mon_dic[targ_mon1]]
+        excls = rules.exclLq[mon_dic[targ_mon1]]
+        prods = [homopolymA(cached_mol(m1), mons=mons, excls=excls,
+                            targ_mon1=targ_mon1, Ps_rxnL=Ps_rxnL,
+                            mon_dic=mon_dic, monL=monL)
+                 for m1, m2 in pairs]
+    return pd.Series(prods, index=pairs.index, dtype=object)
+
+
+def run_polym(pairs, P_class, i, cache=None, n_jobs=None, chunksize=None,
+              engine=None):
+    """
+    Generates the polymers of monomer pairs with the i-th polymer set
+    of `Ps_GenL[P_class]`, looking up the cache first and sharding the
+    remaining pairs over worker processes.
+
+    Args:
+        pairs (list): (mon1, mon2) tuples of canonical SMILES.
+            mon2 is '' for a homopolymerization.
+        P_class (str): The polymer class.
+        i (int): Index of the polymer set in `Ps_GenL[P_class]`.
+        cache (ProductCache, optional): Cache of the polymerization
+            products. Defaults to None.
+        n_jobs (int, optional): Number of worker processes.
+            Defaults to 1.
+        chunksize (int, optional): Number of pairs per chunk.
+        engine (str, optional): 'reaction' or 'fragment' (polym_chunk).
+            Defaults to 'reaction'.
+
+    Returns:
+        list: The lists of generated CRU SMILES in the order of `pairs`.
+
+    """
+    if cache is None:
+        with stage('polym.react', rows=len(pairs)):
+            return run_chunks(
+                polym_chunk, pd.Series(pairs, dtype=object),
+                n_jobs=n_jobs, chunksize=chunksize,
+                initializer=init_worker, args=(P_class, i, engine)).tolist()
+    with stage('polym.cache', rows=len(pairs)):
+        rxn_key = rules.Ps_GenK[P_class][i]
+        keys = [(m1, m2, rxn_key, P_class) for m1, m2 in pairs]
+        prods = [cache.get(k) for k in keys]
+        miss = [j for j, e in enumerate(prods) if e is None]
+    with stage('polym.react', rows=len(miss)):
+        rsl = run_chunks(polym_chunk,
+                         pd.Series([pairs[j] for j in miss], index=miss,
+                                   dtype=object),
+                         n_jobs=n_jobs, chunksize=chunksize,
+                         initializer=init_worker, args=(P_class, i, engine))
+    for j, e in rsl.items():
+        prods[j] = e
+        cache.put(keys[j], e)
+    return prods
+
+
+def match_templ(smis, templ):
+    """
+    Selects the monomers matching a reactant template of a reaction.
+    A pair of monomers can react only if each of them matches its
+    template, so that the pairs of the other monomers are never
+    polymerized.
+
+    Args:
+        smis (list): Canonical SMILES of the monomers.
+        templ (rdkit.Chem.Mol): The reactant template.
+
+    Returns:
+        list: The SMILES in `smis` matching `templ`, in their order.
+
+    """
+    chk = {}
+    for s in smis:
+        if s not in chk:
+            m = cached_mol(s)
+            chk[s] = m is not None and pd.notna(m) and \
+                m.HasSubstructMatch(templ)
+    return [s for s in smis if chk[s]]
+
+
+def count_pairs(temp1, temp2):
+    # number of (mon1, mon2) pairs of different monomers
+    c2 = collections.Counter(temp2)
+    return len(temp1) * len(temp2) - sum(c2[s] for s in temp1)
+
+
+def prune_pairs(temp1, temp2, P_class, i):
+    """
+    Drops the monomers which can not react in the binary polymer set
+    i of `Ps_GenL[P_class]`, by testing each monomer once against
+    its reactant template (Ps_GenT) instead of running the reaction
+    for every pair. The number of pruned pairs is recorded to the
+    active Profiler as the rows of the stage 'polym.prune'.
+
+    Args:
+        temp1 (list): Canonical SMILES of the candidates of mon1.
+        temp2 (list): Canonical SMILES of the candidates of mon2.
+        P_class (str): The polymer class.
+        i (int): Index of the polymer set in `Ps_GenL[P_class]`.
+
+    Returns:
+        tuple: The candidates of mon1 and mon2 and the number of
+        pruned pairs.
+
+    """
+    templs = rules.Ps_GenT[P_class][i]
+    if templs is None:
+        return temp1, temp2, 0
+    with stage('polym.index', rows=len(temp1)+len(temp2)):
+        num = count_pairs(temp1, temp2)
+        temp1 = match_templ(temp1, templs[0])
+        temp2 = match_templ(temp2, templs[1])
+        pruned = num - count_pairs(temp1, temp2)
+    record('polym.prune', 0.0, rows=pruned)
+    return temp1, temp2, pruned
+
+
+def biplym_src(df, targ):
+    """
+    Resolves the targetted polymer classes and extracts the monomer
+    class columns of the source DataFrame for biplym and iter_biplym.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame containing monomer information.
+        targ (list): List of targetted polymer classes, or ['all', ]
+            or ['exc_ole', ].
+
+    Returns:
+        tuple or None: The polymer classes and the DataFrame of
+        'smip_cand_mons' and the boolean monomer class columns,
+        or None if an invalid polymer class is given.
+
+    """
+    mon_dic = rules.mon_dic
+    Ps_classL = rules.Ps_classL
 
     # set the generated polymer class
     targL = []
@@ -135,13 +298,127 @@ def biplym(df, targ=None, dsp_rsl=None):
         DF[col_nam] = DF[col_nam].replace('False', '')
         DF[col_nam] = DF[col_nam].astype('bool')
 
+    return targL, DF
+
+
+def drop_dupl_reactset(DF_gendP):
+    """
+    Drops the duplicated polymerization reactions, i.e. the rows with
+    the same set of monomers ('reactset') and the same polymer, keeping
+    the first one, and adds the 'reactset' column. The monomers and
+    polymers are factorized into integer codes and the duplicates are
+    found on the (min, max, polym) codes instead of object columns.
+
+    Args:
+        DF_gendP (pd.DataFrame): The exploded polymers with the columns
+            'mon1', 'mon2' and 'polym', where 'mon1' != 'mon2'.
+
+    Returns:
+        pd.DataFrame: The unique rows with 'reactset', the sorted
+        tuple of 'mon1' and 'mon2', and a reset index.
+
+    """
+    n = len(DF_gendP)
+    mon_codes, mons = pd.factorize(
+        np.concatenate([DF_gendP['mon1'].to_numpy(dtype=object),
+                        DF_gendP['mon2'].to_numpy(dtype=object)]))
+    c1 = mon_codes[:n]
+    c2 = mon_codes[n:]
+    polym_codes = pd.factorize(DF_gendP['polym'].to_numpy(dtype=object))[0]
+    dupl = pd.DataFrame({
+        'lo': np.minimum(c1, c2),
+        'hi': np.maximum(c1, c2),
+        'polym': polym_codes}).duplicated().to_numpy()
+    DF_gendP = DF_gendP[~dupl].reset_index(drop=True)
+
+    mon1 = DF_gendP['mon1'].to_numpy(dtype=object)
+    mon2 = DF_gendP['mon2'].to_numpy(dtype=object)
+    lt = mon1 < mon2
+    DF_gendP['reactset'] = list(zip(np.where(lt, mon1, mon2),
+                                    np.where(lt, mon2, mon1)))
+    return DF_gendP
+
+
+def biplym(df, targ=None, dsp_rsl=None, cache=None,
+           n_jobs=None, chunksize=None, engine=None):
+    """
+    Generates polymers based on the input DataFrame and 
+    specified target polymer classes.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame containing monomer information.
+            Must include a column named 'smip_cand_mons'.
+        targ (list, optional): List of targetted polymer classes to 
+            generate. Defaults to ['all', ] to include all available
+            classes. Use ['exc_ole'] to exclude polyolefins.
+        dsp_rsl (bool, optional): Whether to display the results summary.
+            Defaults to False.
+        cache (ProductCache, optional): Cache of the polymerization
+            products (prodcache.py), reused across calls. Defaults to
+            None (no caching).
+        n_jobs (int, optional): Number of worker processes over which
+            the monomer pairs are sharded. -1 uses all CPUs.
+            Defaults to 1 (no worker process).
+        chunksize (int, optional): Number of monomer pairs per chunk
+            sent to a worker process. Defaults to splitting the pairs
+            of each polymer set into 4 chunks per worker.
+        engine (str, optional): 'reaction' to run the polymerization
+            reaction for each monomer pair, or 'fragment' to generate
+            the half CRUs once per monomer and join them for each pair
+            (polym_chunk). Defaults to 'reaction'.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the generated polymers 
+        with the following columns:
+            - 'mon1': First monomer.
+            - 'mon2': Second monomer (if applicable).
+            - 'polym': Generated polymer.
+            - 'polymer_class': Class of the polymer.
+            - 'Ps_rxnL': Reaction key for the polymerization.
+
+    Notes:
+        - The function filters and processes the input DataFrame
+          to identify valid monomers.
+        - Polymers are generated based on predefined polymerization rules
+          and target classes.
+        - Duplicate polymerization reactions are removed,
+          and the resulting DataFrame is adjusted.
+        - The monomer pairs which can not match the reactant templates
+          of a binary reaction are pruned beforehand (prune_pairs).
+        - If `dsp_rsl` is True, the function prints the number
+          of polymerization reactions (excluding the pruned pairs),
+          of pruned pairs and of generated polymers.
+        - The result does not depend on `n_jobs`, `chunksize` and
+          `engine`.
+
+    Raises:
+        ValueError: If an invalid polymer class is specified in `targ`,
+            or an invalid `engine`.
+
+    """
+    if targ == None:
+        targ = ['all', ]
+    if dsp_rsl == None:
+        dsp_rsl = False
+    if engine is not None and engine not in ENGINES:
+        raise ValueError('engine must be one of {}'.format(ENGINES))
+    Ps_GenL = rules.Ps_GenL
+    Ps_GenK = rules.Ps_GenK
+
+    src = biplym_src(df, targ)
+    if src is None:
+        return
+    targL, DF = src
+
     DF_Pgen = pd.DataFrame(
         # 20240826added
         columns=['mon1', 'mon2', 'polym', 'polymer_class', 'Ps_rxnL'])
 
     # generate polymer
+    num_pruned = 0
     for P_class in targL:
-        for P_set in Ps_GenL[str(P_class)]:
+        for i, (P_set, Ps_rxnL_key) in enumerate(zip(Ps_GenL[str(P_class)],
+                                                     Ps_GenK[P_class])):
             targ_mon1 = ''
             targ_mon2 = ''
             targ_mon1 = P_set[0]
@@ -149,13 +426,6 @@ def biplym(df, targ=None, dsp_rsl=None):
             temp1 = []
             temp2 = []
 
-            # 20240826 addded
-            Ps_rxnL_key = []
-            Ps_rxnL_key = [
-                k for k, v in Ps_rxnL.items()
-                if AllChem.ReactionToSmarts(v) == AllChem.ReactionToSmarts(P_set[2])
-            ]
-
             DF10 = DF[DF[targ_mon1]]
             temp1 = list(DF10['smip_cand_mons'])
             if len(temp1) != 0:
@@ -163,7 +433,10 @@ def biplym(df, targ=None, dsp_rsl=None):
                     DF20 = DF[DF[targ_mon2]]
                     temp2 = list(DF20['smip_cand_mons'])
                     del DF10, DF20
-                    if len(temp2) != 0:
+                    temp1, temp2, pruned = prune_pairs(
+                        temp1, temp2, P_class, i)
+                    num_pruned += pruned
+                    if len(temp1) != 0 and len(temp2) != 0:
                         combs = [[m1, m2] for m1 in temp1 for m2 in temp2]
                         temp11 = []
                         temp21 = []
@@ -177,115 +450,296 @@ def biplym(df, targ=None, dsp_rsl=None):
                             columns=['mon1', 'mon2'])
                         DF_temp['polymer_class'] = str(P_class)
                         DF_temp['Ps_rxnL'] = int(
-                            Ps_rxnL_key[0])  # 20240826added
-                        targ_rxn = P_set[2]
-                        DF_temp['polym'] = DF_temp.apply(
-                            lambda x: [genmol(x['mon1']), genmol(x['mon2'])],
-                            axis=1
-                        ).apply(
-                            bipolymA,
-                            targ_rxn=targ_rxn,
-                            monL=monL,
-                            Ps_rxnL=Ps_rxnL,
-                            P_class=P_class
-                        )
+                            Ps_rxnL_key)  # 20240826added
+                        DF_temp['polym'] = pd.Series(run_polym(
+                            list(zip(temp11, temp21)), P_class, i,
+                            cache=cache, n_jobs=n_jobs, chunksize=chunksize,
+                            engine=engine),
+                            index=DF_temp.index, dtype=object)
                         DF_Pgen = pd.concat(
                             [DF_Pgen, DF_temp], ignore_index=True, copy=False)
                 else:
-                    temp2 = ['' for i in range(len(temp1))]
+                    temp2 = ['' for _ in range(len(temp1))]
                     DF_temp = pd.DataFrame()
                     DF_temp = pd.DataFrame(
                         data={'mon1': temp1, 'mon2': temp2},
                         columns=['mon1', 'mon2'])
                     DF_temp['polymer_class'] = str(P_class)
-                    DF_temp['Ps_rxnL'] = int(Ps_rxnL_key[0])  # 20240826added
-                    mons = monL[mon_dic[targ_mon1]]
-                    excls = exclL[mon_dic[targ_mon1]]
-                    DF_temp['polym'] = DF_temp.apply(
-                        lambda x: genmol(x['mon1']),
-                        axis=1
-                    ).apply(
-                        homopolymA,
-                        mons=mons,
-                        excls=excls,
-                        targ_mon1=targ_mon1,
-                        Ps_rxnL=Ps_rxnL,
-                        mon_dic=mon_dic,
-                        monL=monL
-                    )
+                    DF_temp['Ps_rxnL'] = int(Ps_rxnL_key)  # 20240826added
+                    DF_temp['polym'] = pd.Series(run_polym(
+                        list(zip(temp1, temp2)), P_class, i,
+                        cache=cache, n_jobs=n_jobs, chunksize=chunksize,
+                        engine=engine),
+                        index=DF_temp.index, dtype=object)
                     DF_Pgen = pd.concat(
                         [DF_Pgen, DF_temp], ignore_index=True, copy=False)
 
     num_polym_react = len(DF_Pgen)
-    DF_gendP = DF_Pgen.explode('polym')
-    DF_gendP = DF_gendP.reset_index(drop=True)
-    DF_gendP = DF_gendP.dropna(subset=['polym'])
+    with stage('biplym.explode', rows=num_polym_react):
+        DF_gendP = DF_Pgen.explode('polym')
+        DF_gendP = DF_gendP.reset_index(drop=True)
+        DF_gendP = DF_gendP.dropna(subset=['polym'])
 
-    # adjust DataFrame
-    DF_gendP.replace({'polym': {'': np.nan}}, inplace=True)
+        # adjust DataFrame
+        DF_gendP.replace({'polym': {'': np.nan}}, inplace=True)
 
     # drpo duplicated polymerization reaction
     DF_gendP = DF_gendP.dropna(subset=['polym'])
     DF_gendP = DF_gendP[DF_gendP['mon1'] != DF_gendP['mon2']]
-    DF_gendP['reactset'] = np.sort(
-        DF_gendP.loc[:, ['mon1', 'mon2']].values).tolist()
-    DF_gendP['reactset'] = DF_gendP['reactset'].apply(set).apply(tuple)
-    DF_gendP = DF_gendP.drop_duplicates(subset=['reactset', 'polym'])
-    DF_gendP = DF_gendP.reset_index(drop=True)
+    with stage('biplym.dedup', rows=len(DF_gendP)):
+        DF_gendP = drop_dupl_reactset(DF_gendP)
     if dsp_rsl:
         print('number of polymerization reactions = ', num_polym_react)
+        print('number of pruned monomer pairs = ', num_pruned)
         print('number of generated polymers = ', len(DF_gendP))
     else:
         pass
     return DF_gendP
 
-# set the olefin class(es) of the copolymer
 
+def iter_biplym(df, targ=None, batchsize=None, drop_dupl=None, cache=None,
+                n_jobs=None, chunksize=None, df_new=None, known=None,
+                engine=None):
+    """
+    Streaming version of biplym. The monomer pairs of each polymer set
+    are generated lazily and polymerized batch by batch, and the
+    generated polymers are yielded as soon as each batch is finished,
+    so that neither the pair list nor the whole library is held
+    in memory.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame containing monomer information.
+            Must include a column named 'smip_cand_mons'.
+        targ (list, optional): List of targetted polymer classes to
+            generate. Defaults to ['all', ]. Use ['exc_ole'] to exclude
+            polyolefins.
+        batchsize (int, optional): Number of monomer pairs per batch.
+            Defaults to 10000.
+        drop_dupl (bool, optional): Whether to drop the duplicated
+            (reactset, polym) records across all batches, as biplym does.
+            The keys of the yielded records are kept in memory for this.
+            Defaults to True.
+        cache (ProductCache, optional): Cache of the polymerization
+            products (prodcache.py). Defaults to None.
+        n_jobs (int, optional): Number of worker processes used for
+            each batch. Defaults to 1.
+        chunksize (int, optional): Number of monomer pairs per chunk
+            sent to a worker process.
+        df_new (pd.DataFrame, optional): Classified new monomers. If
+            given, only the pairs involving them are generated, i.e.
+            new x (`df` + new) and `df` x new, and the homopolymers of
+            the new monomers. Defaults to None.
+        known (iterable, optional): (reactset, polym) keys of
+            the polymers generated before, which are dropped when
+            `drop_dupl` is True. Defaults to None.
+        engine (str, optional): 'reaction' or 'fragment', as in biplym.
+            Defaults to 'reaction'.
+
+    Notes:
+        - As in biplym, the monomer pairs which can not match the
+          reactant templates of a binary reaction are pruned (prune_pairs).
+
+    Yields:
+        pd.DataFrame: The generated polymers of a batch, with the
+        columns of biplym ('mon1', 'mon2', 'polym', 'polymer_class',
+        'Ps_rxnL' and 'reactset'). Empty batches are skipped.
 
-def ole_copolym(df, targ=None, ncomp=None, dsp_rsl=None, drop_dupl=None):
     """
-    Generates a DataFrame of copolymers based on the provided 
-    olefin classes and parameters.
+    if targ is None:
+        targ = ['all', ]
+    if batchsize is None:
+        batchsize = 10000
+    if drop_dupl is None:
+        drop_dupl = True
+    if engine is not None and engine not in ENGINES:
+        raise ValueError('engine must be one of {}'.format(ENGINES))
+    Ps_GenL = rules.Ps_GenL
+    Ps_GenK = rules.Ps_GenK
+
+    src = biplym_src(df, targ)
+    if src is None:
+        return
+    targL, DF = src
+    if df_new is not None:
+        src = biplym_src(df_new, targ)
+        if src is None:
+            return
+        DF_new = src[1]
+
+    seen = set(known) if known is not None else set()
+    for P_class in targL:
+        for i, (P_set, Ps_rxnL_key) in enumerate(zip(Ps_GenL[str(P_class)],
+                                                     Ps_GenK[P_class])):
+            temp1 = list(DF.loc[DF[P_set[0]], 'smip_cand_mons'])
+            if df_new is None:
+                if len(temp1) == 0:
+                    continue
+                if P_set[1] != 'none':
+                    temp2 = list(DF.loc[DF[P_set[1]], 'smip_cand_mons'])
+                    temp1, temp2, _ = prune_pairs(temp1, temp2, P_class, i)
+                    pairs = itertools.product(temp1, temp2)
+                else:
+                    pairs = ((m1, '') for m1 in temp1)
+            else:
+                new1 = list(DF_new.loc[DF_new[P_set[0]], 'smip_cand_mons'])
+                if P_set[1] != 'none':
+                    temp2 = list(DF.loc[DF[P_set[1]], 'smip_cand_mons'])
+                    new2 = list(
+                        DF_new.loc[DF_new[P_set[1]], 'smip_cand_mons'])
+                    new1, temp2, _ = prune_pairs(new1, temp2, P_class, i)
+                    temp1, new2, _ = prune_pairs(temp1, new2, P_class, i)
+                    pairs = itertools.chain(
+                        itertools.product(new1, temp2 + new2),
+                        itertools.product(temp1, new2))
+                else:
+                    pairs = ((m1, '') for m1 in new1)
+            pairs = ((m1, m2) for m1, m2 in pairs if m1 != m2)
+
+            while True:
+                batch = list(itertools.islice(pairs, batchsize))
+                if len(batch) == 0:
+                    break
+                DF_temp = pd.DataFrame(batch, columns=['mon1', 'mon2'])
+                DF_temp['polym'] = pd.Series(run_polym(
+                    batch, P_class, i,
+                    cache=cache, n_jobs=n_jobs, chunksize=chunksize,
+                    engine=engine),
+                    index=DF_temp.index, dtype=object)
+                DF_temp['polymer_class'] = str(P_class)
+                DF_temp['Ps_rxnL'] = int(Ps_rxnL_key)
+                DF_temp = DF_temp.explode('polym')
+                DF_temp = DF_temp[DF_temp['polym'].notna()
+                                  & (DF_temp['polym'] != '')]
+                DF_temp['reactset'] = [
+                    tuple(sorted({m1, m2}))
+                    for m1, m2 in zip(DF_temp['mon1'], DF_temp['mon2'])]
+                if drop_dupl:
+                    keep = []
+                    for k in zip(DF_temp['reactset'], DF_temp['polym']):
+                        keep.append(k not in seen)
+                        seen.add(k)
+                    DF_temp = DF_temp[keep]
+                if len(DF_temp) != 0:
+                    yield DF_temp.reset_index(drop=True)
+
+
+def biplym_stream(df, path_out, targ=None, batchsize=None, dsp_rsl=None,
+                  drop_dupl=None, cache=None, n_jobs=None, chunksize=None,
+                  engine=None):
+    """
+    Writes the polymers generated by iter_biplym incrementally to a CSV
+    file or a directory of Parquet parts (libio.py), so that libraries
+    larger than the memory can be generated.
 
     Args:
-        df (pd.DataFrame): Input DataFrame containing olefin classification 
-            and candidate monomers.
-        targ (list, optional): List of target olefin classes. 
-            Must be provided as a list. Defaults to None.
-        ncomp (int, optional): Number of components for copolymerization. 
+        df (pd.DataFrame): Input DataFrame containing monomer information.
+        path_out (str): Output CSV file, or directory of Parquet parts
+            if the extension is '.parquet'.
+        targ (list, optional): List of targetted polymer classes.
+            Defaults to ['all', ].
+        batchsize (int, optional): Number of monomer pairs per batch.
+            Defaults to 10000.
+        dsp_rsl (bool, optional): Whether to display the progress.
+            Defaults to False.
+        drop_dupl (bool, optional): Whether to drop the duplicated
+            records. Defaults to True.
+        cache (ProductCache, optional): Cache of the polymerization
+            products. Defaults to None.
+        n_jobs (int, optional): Number of worker processes.
             Defaults to 1.
-        dsp_rsl (bool, optional): If True, displays the number of 
-            generated copolymers. Defaults to False.
-        drop_dupl (bool, optional): If True, drops duplicate copolymers 
-            from the resulting DataFrame. Defaults to True.
+        chunksize (int, optional): Number of monomer pairs per chunk
+            sent to a worker process.
+        engine (str, optional): 'reaction' or 'fragment', as in biplym.
+            Defaults to 'reaction'.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the generated copolymers 
-        with columns:
-            - 'mon1': First monomer (if applicable).
-            - 'mon2': Second monomer (if applicable).
-            - 'polym': Polymer structure.
-            - 'polymer_class': Polymer classification.
-            - 'Ps_rxnL': Reaction conditions or initiators.
-            - 'reactset': Reactant set.
+        int: Number of generated polymers written to the output.
 
-    Raises:
-        ValueError: If `targ` is not provided or is not a list.
-        ValueError: If `targ` contains invalid olefin classes.
-        ValueError: If `ncomp` is less than the number of components in `targ`.
-        ValueError: If incompatible olefin classes are used together 
-            (e.g., ROMP with other classes).
+    """
+    if dsp_rsl is None:
+        dsp_rsl = False
+    writer = TableWriter(path_out)
+    rows = 0
+    for DF_temp in iter_biplym(df, targ=targ, batchsize=batchsize,
+                               drop_dupl=drop_dupl, cache=cache,
+                               n_jobs=n_jobs, chunksize=chunksize,
+                               engine=engine):
+        writer.write(DF_temp)
+        rows += len(DF_temp)
+        if dsp_rsl:
+            print('number of generated polymers = ', rows)
+    return rows
 
-    Todo:
-        - Add procedure to removing some remaining duplicates in ROMP(H).
-        - Add cationic polymerization via non-classical cations.
 
-    Notes:
-        - Valid olefin classes are displayed when the function is
-          called without valid `targ`.
-        - Special handling is applied for ROMP, ROMPH, and COC classes.
-        - The function may take longer to execute if the input DataFrame
-          is large and `drop_dupl` is True.
+def biplym_update(DF_lib, df, df_new, targ=None, batchsize=None,
+                  dsp_rsl=None, cache=None, n_jobs=None, chunksize=None,
+                  engine=None):
+    """
+    Incrementally updates a polymer library generated by biplym when
+    new monomers are added. Only the pairs involving the new monomers
+    are polymerized, so that the cost scales with the new monomers.
+
+    Args:
+        DF_lib (pd.DataFrame): The existing library, the output of biplym
+            (or of this function) for `df`.
+        df (pd.DataFrame): The classified monomers from which `DF_lib`
+            was generated.
+        df_new (pd.DataFrame): The classified new monomers.
+        targ (list, optional): List of targetted polymer classes, the
+            same as for `DF_lib`. Defaults to ['all', ].
+        batchsize (int, optional): Number of monomer pairs per batch.
+            Defaults to 10000.
+        dsp_rsl (bool, optional): Whether to display the number of
+            added polymers. Defaults to False.
+        cache (ProductCache, optional): Cache of the polymerization
+            products. Defaults to None.
+        n_jobs (int, optional): Number of worker processes.
+            Defaults to 1.
+        chunksize (int, optional): Number of monomer pairs per chunk
+            sent to a worker process.
+        engine (str, optional): 'reaction' or 'fragment', as in biplym.
+            Defaults to 'reaction'.
+
+    Returns:
+        pd.DataFrame: `DF_lib` with the new polymers appended, without
+        the duplicates of the (reactset, polym) keys in `DF_lib`.
+
+    """
+    if dsp_rsl is None:
+        dsp_rsl = False
+    known = zip([tuple(sorted({m1, m2}))
+                 for m1, m2 in zip(DF_lib['mon1'], DF_lib['mon2'])],
+                DF_lib['polym'])
+    DF_L = list(iter_biplym(df, targ=targ, batchsize=batchsize,
+                            drop_dupl=True, cache=cache, n_jobs=n_jobs,
+                            chunksize=chunksize, df_new=df_new, known=known,
+                            engine=engine))
+    if dsp_rsl:
+        print('number of added polymers = ', sum(len(e) for e in DF_L))
+    return pd.concat([DF_lib] + DF_L, ignore_index=True)
+
+# set the olefin class(es) of the copolymer
+
+
+def ole_copolym_src(df, targ, ncomp=None, cache=None):
+    """
+    Validates the olefin classes and collects the candidate CRUs and
+    the type of initiator for ole_copolym, iter_ole_copolym and
+    count_ole_copolym.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame containing olefin classification
+            and candidate monomers.
+        targ (list): List of target olefin classes.
+        ncomp (int, optional): Number of components for copolymerization.
+            Defaults to 1.
+        cache (ProductCache, optional): Cache of the CRUs of ROMP(H) and
+            COC. Defaults to None.
+
+    Returns:
+        tuple or None: (number of required olefin classes, `ncomp`,
+        candidate CRUs as [olefin class, CRU, monomer] lists, type of
+        initiator), or None if the arguments are invalid.
 
     """
 
@@ -294,10 +748,10 @@ def ole_copolym(df, targ=None, ncomp=None, dsp_rsl=None, drop_dupl=None):
         return
     if ncomp is None:
         ncomp = 1
-    if dsp_rsl is None:
-        dsp_rsl = False
-    if drop_dupl is None:
-        drop_dupl = True
+    mon_vals = rules.mon_vals
+    mon_dic_inv = rules.mon_dic_inv
+    Ps_rxnL = rules.Ps_rxnL
+    Ps_GenL = rules.Ps_GenL
 
     # explanation
     template_ole_keys = [mon_dic_inv[i] for i in mon_vals[3]]
@@ -325,10 +779,14 @@ def ole_copolym(df, targ=None, ncomp=None, dsp_rsl=None, drop_dupl=None):
         if ncomp > 2:
             print('Reccomend: nocmp=1 for ROMP, ROMPH and 2 for COC')
 
+    def coord_polym_c(smi, rxn_key):
+        if cache is None:
+            return coord_polym(smi, Ps_rxnL[rxn_key])
+        return cache.polym((smi, '', rxn_key, 'polyolefin'),
+                           coord_polym, smi, Ps_rxnL[rxn_key])
+
     # reconsruct the list of  cllasified olefin monomers for co-polymerization
     cand_cru = []
-    comb_cru = []
-    copoly_cru = []
 
     ole_clsL = df['ole_cls'].to_list()
     cand_monsL = df['smip_cand_mons'].to_list()
@@ -352,7 +810,7 @@ def ole_copolym(df, targ=None, ncomp=None, dsp_rsl=None, drop_dupl=None):
             if m[0][ole][0]:
                 ole_targL2.append([ole, m[0][ole][2], m[1]])
         for e in ole_targL2:
-            e[1] = coord_polym(e[2], Ps_rxnL[1050])
+            e[1] = coord_polym_c(e[2], 1050)
         # explode the list of generated CRU
         cand_cru = [[e[0], sub_e, e[2]] for e in ole_targL2 for sub_e in e[1]]
         if targ == ['ROMPH']:
@@ -375,7 +833,7 @@ def ole_copolym(df, targ=None, ncomp=None, dsp_rsl=None, drop_dupl=None):
                             if ole == 'cycCH':
                                 ole_targL2cyc.append([ole, m[0][ole][2], m[1]])
                                 for e in ole_targL2cyc:
-                                    e[1] = coord_polym(e[2], Ps_rxnL[1051])
+                                    e[1] = coord_polym_c(e[2], 1051)
                 elif ole == 'aliphCH':
                     for m in ole_targL:
                         if m[0][ole][0] == True:
@@ -383,10 +841,10 @@ def ole_copolym(df, targ=None, ncomp=None, dsp_rsl=None, drop_dupl=None):
                                 ole_targL2chain.append(
                                     [ole, m[0][ole][2], m[1]])
                                 for e in ole_targL2:
-                                    e[1] = coord_polym(e[2], Ps_rxnL[1052])
+                                    e[1] = coord_polym_c(e[2], 1052)
                             ole_targL2chain.append([ole, m[0][ole][2], m[1]])
                             for e in ole_targL2chain:
-                                e[1] = coord_polym(e[2], Ps_rxnL[1052])
+                                e[1] = coord_polym_c(e[2], 1052)
             ole_targL2 = list(itertools.chain(ole_targL2cyc, ole_targL2chain))
             # explode the list of generated CRU
             cand_cru = [[e[0], sub_e, e[2]]
@@ -396,26 +854,7 @@ def ole_copolym(df, targ=None, ncomp=None, dsp_rsl=None, drop_dupl=None):
         print('reconfirm olefin class(es)')
         return
 
-    # generate copolymers
-    comb_cru = [e for e in itertools.combinations(cand_cru, ncomp)]
-
-    # Exclude if it does not contain all defined olefin class as the component
-    for e in comb_cru:
-        if len({l[0] for l in e}) >= len(targ):
-            copoly_cru.append((
-                [l[0] for l in e],
-                [l[1] for l in e],
-                [l[2] for l in e]
-            ))
-        else:
-            pass
-
-    # Export as Pandas DataFrame
-    DF_Pgen = pd.DataFrame(
-        columns=['mon1', 'mon2', 'polym', 'polymer_class',
-                 'Ps_rxnL', 'reactset'])
-    DF_Pgen[['polymer_class', 'polym', 'reactset']] = pd.DataFrame(copoly_cru)
-    DF_Pgen = DF_Pgen.fillna({'mon1': '', 'mon2': ''})
+    ntarg = len(targ)
 
     # Type of initiator
     l_initiator = ['rec:radi', 'rec:cati', 'rec:ani']
@@ -429,18 +868,169 @@ def ole_copolym(df, targ=None, ncomp=None, dsp_rsl=None, drop_dupl=None):
             pass
     if len(rec_initiator) == 0:
         rec_initiator = np.nan
-    DF_Pgen['Ps_rxnL'] = DF_Pgen.apply(lambda x: rec_initiator, axis=1)
+    return ntarg, ncomp, cand_cru, rec_initiator
+
 
-    # Drop duplicated copolymer. It takes long time
-    # when the DataFrame (DF_Pgen) was large.
+def ole_copolym_batches(src, batchsize=None, drop_dupl=None):
+    """
+    Lazily combines the candidate CRUs given by ole_copolym_src into
+    copolymers and yields them batch by batch. The combinations are
+    filtered on the fly, so that they are never held in memory at once.
+    The duplicates are dropped during the generation, keyed by the
+    sorted integer IDs of the CRUs.
+
+    Args:
+        src (tuple): The return value of ole_copolym_src.
+        batchsize (int, optional): Number of copolymers per batch.
+            Defaults to 100000.
+        drop_dupl (bool, optional): Whether to drop the duplicated
+            copolymers across all batches. Defaults to True.
+
+    Yields:
+        pd.DataFrame: The copolymers of a batch, with the columns of
+        ole_copolym.
+
+    """
+    if batchsize is None:
+        batchsize = 100000
+    if drop_dupl is None:
+        drop_dupl = True
+    ntarg, ncomp, cand_cru, rec_initiator = src
+
+    # integer ID of each distinct CRU; a copolymer is identified by
+    # the sorted tuple of the IDs of its CRUs
+    cru_ids = {}
+    cand_ids = [cru_ids.setdefault(e[1], len(cru_ids)) for e in cand_cru]
+
+    # Exclude if it does not contain all defined olefin class as the component
+    combs = (e for e in itertools.combinations(range(len(cand_cru)), ncomp)
+             if len({cand_cru[j][0] for j in e}) >= ntarg)
     if drop_dupl:
-        DF_Pgen['temp_dro_dupl'] = DF_Pgen.apply(
-            lambda x: "".join(sorted(x['polym'])), axis=1)
-        DF_gendP = DF_Pgen.drop_duplicates(subset='temp_dro_dupl')
-        DF_gendP = DF_gendP.drop('temp_dro_dupl', axis=1)
-        DF_gendP = DF_gendP.reset_index(drop=True)
+        seen = set()
+
+        def is_new(e):
+            k = tuple(sorted(cand_ids[j] for j in e))
+            if k in seen:
+                return False
+            seen.add(k)
+            return True
+        combs = filter(is_new, combs)
+    while True:
+        batch = list(itertools.islice(combs, batchsize))
+        if len(batch) == 0:
+            break
+        copoly_cru = [(
+            [cand_cru[j][0] for j in e],
+            [cand_cru[j][1] for j in e],
+            [cand_cru[j][2] for j in e]
+        ) for e in batch]
+        DF_Pgen = pd.DataFrame({
+            'mon1': '',
+            'mon2': '',
+            'polym': [e[1] for e in copoly_cru],
+            'polymer_class': [e[0] for e in copoly_cru],
+            'Ps_rxnL': [rec_initiator for e in copoly_cru],
+            'reactset': [e[2] for e in copoly_cru]})
+        yield DF_Pgen
+
+
+def count_combs(cand_cru, ncomp, ntarg):
+    """
+    Counts the combinations of `ncomp` candidate CRUs containing at least
+    `ntarg` olefin classes, without enumerating them.
+
+    Args:
+        cand_cru (list): Candidate CRUs as [olefin class, CRU, monomer].
+        ncomp (int): Number of components.
+        ntarg (int): Number of required olefin classes.
+
+    Returns:
+        int: Number of the combinations.
+
+    """
+    # cnt[j][d]: number of ways to choose j CRUs from d olefin classes
+    cnt = [[0]*(ncomp+1) for _ in range(ncomp+1)]
+    cnt[0][0] = 1
+    for n in collections.Counter(e[0] for e in cand_cru).values():
+        new = [row[:] for row in cnt]
+        for j in range(ncomp+1):
+            for d in range(ncomp):
+                if cnt[j][d] == 0:
+                    continue
+                for k in range(1, min(n, ncomp-j)+1):
+                    new[j+k][d+1] += cnt[j][d]*math.comb(n, k)
+        cnt = new
+    return sum(cnt[ncomp][d] for d in range(ntarg, ncomp+1))
+
+
+def ole_copolym(df, targ=None, ncomp=None, dsp_rsl=None, drop_dupl=None,
+                cache=None):
+    """
+    Generates a DataFrame of copolymers based on the provided 
+    olefin classes and parameters.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame containing olefin classification 
+            and candidate monomers.
+        targ (list, optional): List of target olefin classes. 
+            Must be provided as a list. Defaults to None.
+        ncomp (int, optional): Number of components for copolymerization. 
+            Defaults to 1.
+        dsp_rsl (bool, optional): If True, displays the number of 
+            generated copolymers. Defaults to False.
+        drop_dupl (bool, optional): If True, drops duplicate copolymers 
+            from the resulting DataFrame. Defaults to True.
+        cache (ProductCache, optional): Cache of the CRUs of ROMP(H) and
+            COC (prodcache.py), reused across calls. Defaults to None
+            (no caching).
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the generated copolymers 
+        with columns:
+            - 'mon1': First monomer (if applicable).
+            - 'mon2': Second monomer (if applicable).
+            - 'polym': Polymer structure.
+            - 'polymer_class': Polymer classification.
+            - 'Ps_rxnL': Reaction conditions or initiators.
+            - 'reactset': Reactant set.
+
+    Raises:
+        ValueError: If `targ` is not provided or is not a list.
+        ValueError: If `targ` contains invalid olefin classes.
+        ValueError: If `ncomp` is less than the number of components in `targ`.
+        ValueError: If incompatible olefin classes are used together 
+            (e.g., ROMP with other classes).
+
+    Todo:
+        - Add procedure to removing some remaining duplicates in ROMP(H).
+        - Add cationic polymerization via non-classical cations.
+
+    Notes:
+        - Valid olefin classes are displayed when the function is
+          called without valid `targ`.
+        - Special handling is applied for ROMP, ROMPH, and COC classes.
+        - The combinations of the CRUs are generated lazily, but the
+          result is held in memory. Use count_ole_copolym to estimate
+          its size and ole_copolym_stream for large libraries.
+
+    """
+    if dsp_rsl is None:
+        dsp_rsl = False
+    with stage('ole_copolym.cru'):
+        src = ole_copolym_src(df, targ, ncomp=ncomp, cache=cache)
+    if src is None:
+        return
+    ncomp = src[1]
+
+    # Export as Pandas DataFrame
+    with stage('ole_copolym.combine'):
+        DF_L = list(ole_copolym_batches(src, drop_dupl=drop_dupl))
+    if len(DF_L) != 0:
+        DF_gendP = pd.concat(DF_L, ignore_index=True)
     else:
-        DF_gendP = DF_Pgen
+        DF_gendP = pd.DataFrame(
+            columns=['mon1', 'mon2', 'polym', 'polymer_class',
+                     'Ps_rxnL', 'reactset'])
 
     if dsp_rsl:
         print('Number of generated (co)polymer, ',  ncomp,
@@ -450,4 +1040,102 @@ def ole_copolym(df, targ=None, ncomp=None, dsp_rsl=None, drop_dupl=None):
 
     return DF_gendP
 
+
+def iter_ole_copolym(df, targ=None, ncomp=None, batchsize=None,
+                     drop_dupl=None, cache=None):
+    """
+    Streaming version of ole_copolym. The combinations of the CRUs are
+    generated lazily and the copolymers are yielded batch by batch.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame containing olefin classification
+            and candidate monomers.
+        targ (list): List of target olefin classes.
+        ncomp (int, optional): Number of components for copolymerization.
+            Defaults to 1.
+        batchsize (int, optional): Number of copolymers per batch.
+            Defaults to 100000.
+        drop_dupl (bool, optional): Whether to drop the duplicated
+            copolymers across all batches. Defaults to True.
+        cache (ProductCache, optional): Cache of the CRUs of ROMP(H) and
+            COC. Defaults to None.
+
+    Yields:
+        pd.DataFrame: The copolymers of a batch, with the columns of
+        ole_copolym.
+
+    """
+    src = ole_copolym_src(df, targ, ncomp=ncomp, cache=cache)
+    if src is None:
+        return
+    yield from ole_copolym_batches(src, batchsize=batchsize,
+                                   drop_dupl=drop_dupl)
+
+
+def ole_copolym_stream(df, path_out, targ=None, ncomp=None, batchsize=None,
+                       dsp_rsl=None, drop_dupl=None, cache=None):
+    """
+    Writes the copolymers generated by iter_ole_copolym incrementally
+    to a CSV file or a directory of Parquet parts (libio.py).
+
+    Args:
+        df (pd.DataFrame): Input DataFrame containing olefin classification
+            and candidate monomers.
+        path_out (str): Output CSV file, or directory of Parquet parts
+            if the extension is '.parquet'.
+        targ (list): List of target olefin classes.
+        ncomp (int, optional): Number of components for copolymerization.
+            Defaults to 1.
+        batchsize (int, optional): Number of copolymers per batch.
+            Defaults to 100000.
+        dsp_rsl (bool, optional): Whether to display the progress.
+            Defaults to False.
+        drop_dupl (bool, optional): Whether to drop the duplicated
+            copolymers. Defaults to True.
+        cache (ProductCache, optional): Cache of the CRUs of ROMP(H) and
+            COC. Defaults to None.
+
+    Returns:
+        int: Number of copolymers written to the output.
+
+    """
+    if dsp_rsl is None:
+        dsp_rsl = False
+    writer = TableWriter(path_out)
+    rows = 0
+    for DF_Pgen in iter_ole_copolym(df, targ=targ, ncomp=ncomp,
+                                    batchsize=batchsize, drop_dupl=drop_dupl,
+                                    cache=cache):
+        writer.write(DF_Pgen)
+        rows += len(DF_Pgen)
+        if dsp_rsl:
+            print('Number of generated (co)polymer : ', format(rows, ','))
+    return rows
+
+
+def count_ole_copolym(df, targ=None, ncomp=None, cache=None):
+    """
+    Counts the copolymers which ole_copolym would generate with
+    the given `targ` and `ncomp`, without generating them.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame containing olefin classification
+            and candidate monomers.
+        targ (list): List of target olefin classes.
+        ncomp (int, optional): Number of components for copolymerization.
+            Defaults to 1.
+        cache (ProductCache, optional): Cache of the CRUs of ROMP(H) and
+            COC. Defaults to None.
+
+    Returns:
+        int: Number of the copolymers before dropping the duplicates,
+        i.e. the number given by ole_copolym with `drop_dupl=False`.
+
+    """
+    src = ole_copolym_src(df, targ, ncomp=ncomp, cache=cache)
+    if src is None:
+        return
+    ntarg, ncomp, cand_cru, rec_initiator = src
+    return count_combs(cand_cru, ncomp, ntarg)
+
 # #end
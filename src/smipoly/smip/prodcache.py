@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) 2021 Mitsuru Ohno
+# Use of this source code is governed by a BSD-3-style
+# license that can be found in the LICENSE file.
+
+"""
+memoization of polymerization products for PolymerGenerator (polg.py).
+
+The products (list of CRU SMILES) of a polymerization are cached with
+the key (mon1, mon2, reaction ID, polymer class), where mon1 and mon2 are
+the canonical SMILES of the monomers ('' for a homopolymerization).
+ProductCache keeps the products in memory, SQLiteProductCache also stores
+them in a SQLite database, so that repeated library builds reuse the
+products of the earlier runs.
+
+"""
+import json
+import sqlite3
+from collections import OrderedDict
+
+
+class ProductCache:
+    """
+    Bounded LRU cache of polymerization products.
+
+    Args:
+        maxsize (int, optional): Maximum number of cached reactions.
+            None for an unbounded cache. Defaults to 65536.
+
+    Attributes:
+        hits (int): Number of lookups found in the cache.
+        misses (int): Number of lookups not found in the cache.
+
+    """
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def _get(self, key):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return None
+        return self._data[key]
+
+    def _put(self, key, prods):
+        self._data[key] = prods
+        self._data.move_to_end(key)
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key):
+        """
+        Looks up the products of a polymerization.
+
+        Args:
+            key (tuple): (mon1, mon2, reaction ID, polymer class).
+
+        Returns:
+            list or None: The CRU SMILES, or None if not cached.
+
+        """
+        prods = self._get(key)
+        if prods is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(prods)
+
+    def put(self, key, prods):
+        """
+        Stores the products of a polymerization.
+
+        Args:
+            key (tuple): (mon1, mon2, reaction ID, polymer class).
+            prods (list): The CRU SMILES.
+
+        """
+        self._put(key, tuple(prods))
+
+    def polym(self, key, func, *args, **kwargs):
+        """
+        Returns the cached products of a polymerization, or runs
+        `func(*args, **kwargs)` and caches its result.
+
+        Args:
+            key (tuple): (mon1, mon2, reaction ID, polymer class).
+            func (callable): Polymerization function returning
+                a list of CRU SMILES, e.g. bipolymA or homopolymA.
+
+        Returns:
+            list: The CRU SMILES.
+
+        """
+        prods = self.get(key)
+        if prods is None:
+            prods = func(*args, **kwargs)
+            self.put(key, prods)
+        return prods
+
+    def cache_info(self):
+        """
+        Returns the statistics of the cache.
+
+        Returns:
+            dict: 'hits', 'misses', 'maxsize' and 'currsize'.
+
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'maxsize': self.maxsize, 'currsize': len(self)}
+
+    def clear(self):
+        """Empties the cache and resets the statistics."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class SQLiteProductCache(ProductCache):
+    """
+    Persistent cache of polymerization products in a SQLite database,
+    in front of which a bounded in-memory LRU cache is kept.
+    The new products are committed every `commit_every` reactions and
+    on `flush` or `close`. Can be used as a context manager.
+
+    Args:
+        path (str): Path of the database file, created if missing.
+        maxsize (int, optional): Maximum number of reactions kept
+            in memory. Defaults to 65536.
+        commit_every (int, optional): Number of new reactions
+            per commit. Defaults to 1000.
+
+    """
+
+    def __init__(self, path, maxsize=65536, commit_every=1000):
+        super().__init__(maxsize=maxsize)
+        self.path = str(path)
+        self.commit_every = commit_every
+        self._pending = 0
+        self._con = sqlite3.connect(self.path)
+        self._con.execute(
+            'CREATE TABLE IF NOT EXISTS prods ('
+            'mon1 TEXT, mon2 TEXT, rxn INTEGER, P_class TEXT, prods TEXT, '
+            'PRIMARY KEY (mon1, mon2, rxn, P_class))')
+        self._con.commit()
+
+    def __len__(self):
+        return self._con.execute('SELECT COUNT(*) FROM prods').fetchone()[0]
+
+    def __contains__(self, key):
+        return self._get(key) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get(self, key):
+        prods = super()._get(key)
+        if prods is None:
+            row = self._con.execute(
+                'SELECT prods FROM prods WHERE mon1 = ? AND mon2 = ? '
+                'AND rxn = ? AND P_class = ?', self._row(key)).fetchone()
+            if row is not None:
+                prods = tuple(json.loads(row[0]))
+                super()._put(key, prods)
+        return prods
+
+    def _put(self, key, prods):
+        super()._put(key, prods)
+        self._con.execute('INSERT OR REPLACE INTO prods VALUES (?, ?, ?, ?, ?)',
+                          self._row(key) + (json.dumps(prods),))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    @staticmethod
+    def _row(key):
+        mon1, mon2, rxn, P_class = key
+        return (mon1, mon2, int(rxn), str(P_class))
+
+    def flush(self):
+        """Commits the new products to the database."""
+        self._con.commit()
+        self._pending = 0
+
+    def close(self):
+        """Commits the new products and closes the database."""
+        self.flush()
+        self._con.close()
+
+    def clear(self):
+        """Empties the cache, including the database,
+        and resets the statistics."""
+        super().clear()
+        self._con.execute('DELETE FROM prods')
+        self.flush()
+
+# end
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) 2021 Mitsuru Ohno
+# Use of this source code is governed by a BSD-3-style
+# license that can be found in the LICENSE file.
+
+"""
+instrumentation of MonomerClassifier (monc.py) and PolymerGenerator
+(polg.py).
+
+The hot paths report the wall time, the number of calls and the number
+of rows of each stage (parse, match, react, seq, explode, dedup, ...)
+to the active Profiler, if any. Without an active Profiler the hooks
+cost nearly nothing.
+
+    with Profiler() as prof:
+        DF = monc.moncls(df, 'SMILES')
+        DF_P = polg.biplym(DF)
+    print(prof.to_json())
+
+Only the stages run in the calling process are recorded; with
+n_jobs > 1 the stages run by the worker processes are seen as
+the wall time of the enclosing stage.
+
+"""
+import json
+import time
+from contextlib import contextmanager
+
+_active = []
+
+
+class Profiler:
+    """
+    Records the wall time, the number of calls and the number of rows
+    per stage while it is active (used as a context manager).
+
+    Args:
+        callback (callable, optional): Called as
+            callback(name, seconds, calls, rows) on every record,
+            e.g. to forward the records to a monitoring system.
+            Defaults to None.
+
+    Attributes:
+        stats (dict): {'time', 'calls', 'rows'} per stage name.
+
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.stats = {}
+
+    def __enter__(self):
+        _active.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _active.remove(self)
+
+    def add(self, name, seconds, calls=1, rows=0):
+        """
+        Adds a record of a stage.
+
+        Args:
+            name (str): The stage name, e.g. 'biplym.react'.
+            seconds (float): The wall time [s].
+            calls (int, optional): The number of calls. Defaults to 1.
+            rows (int, optional): The number of processed rows.
+                Defaults to 0.
+
+        """
+        st = self.stats.get(name)
+        if st is None:
+            st = self.stats[name] = {'time': 0.0, 'calls': 0, 'rows': 0}
+        st['time'] += seconds
+        st['calls'] += calls
+        st['rows'] += rows
+        if self.callback is not None:
+            self.callback(name, seconds, calls, rows)
+
+    def to_json(self, path=None):
+        """
+        Exports the records as JSON.
+
+        Args:
+            path (str, optional): Output file. Defaults to None.
+
+        Returns:
+            str: The JSON text.
+
+        """
+        txt = json.dumps(self.stats, indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(txt)
+        return txt
+
+    def to_prometheus(self, prefix='smipoly'):
+        """
+        Exports the records in the Prometheus text format, as the
+        counters '<prefix>_stage_seconds_total', '<prefix>_stage_calls_total'
+        and '<prefix>_stage_rows_total' labeled by the stage name.
+
+        Args:
+            prefix (str, optional): Prefix of the metric names.
+                Defaults to 'smipoly'.
+
+        Returns:
+            str: The Prometheus text.
+
+        """
+        lines = []
+        for key, unit in [('time', 'seconds'), ('calls', 'calls'),
+                          ('rows', 'rows')]:
+            metric = '{}_stage_{}_total'.format(prefix, unit)
+            lines.append('# TYPE {} counter'.format(metric))
+            for name, st in self.stats.items():
+                lines.append('{}{{stage="{}"}} {}'.format(
+                    metric, name, st[key]))
+        return '\n'.join(lines) + '\n'
+
+
+def active():
+    """
+    Returns the active Profiler.
+
+    Returns:
+        Profiler or None: The innermost active Profiler, or None.
+
+    """
+    return _active[-1] if _active else None
+
+
+def record(name, seconds, calls=1, rows=0):
+    """Adds a record to the active Profiler, if any (see Profiler.add)."""
+    if _active:
+        _active[-1].add(name, seconds, calls, rows)
+
+
+@contextmanager
+def stage(name, rows=0):
+    """
+    Records the wall time of the enclosed block as a stage
+    of the active Profiler, if any.
+
+    Args:
+        name (str): The stage name.
+        rows (int, optional): The number of processed rows.
+            Defaults to 0.
+
+    """
+    if not _active:
+        yield
+        return
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - t, rows=rows)
+
+# end
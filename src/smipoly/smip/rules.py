@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) 2021 Mitsuru Ohno
+# Use of this source code is governed by a BSD-3-style
+# license that can be found in the LICENSE file.
+
+"""
+rules for MonomerClassifier (monc.py) and PolymerGenerator (polg.py).
+
+The rule files in the 'rules' directory are loaded lazily, each of them
+once per process on the first access, and shared by monc.py and polg.py.
+
+"""
+import os
+from pathlib import Path
+from functools import cached_property
+import json
+import pickle
+from rdkit.Chem import AllChem
+from .funclib import compile_patts, half_rxns
+
+db_file = os.path.join(str(Path(__file__).resolve().parent.parent), 'rules')
+
+
+class Rules:
+    """
+    Lazily loaded rules of monomer classification and polymer generation.
+
+    Args:
+        path (str, optional): The rules directory. Defaults to the
+            'rules' directory of the package.
+
+    Attributes:
+        mon_vals (list): Monomer class IDs of self-polymerizable,
+            binary-monomer, post-polymerization and olefinic systems.
+        mon_dic (dict): Monomer class names to IDs.
+        mon_dic_inv (dict): Monomer class IDs to names.
+        monL (dict): SMARTS of the objective FGs (keys as in the file).
+        exclL (dict): SMARTS of the incompatible FGs (keys as in the file).
+        monLg (dict): monL indexed by integer class ID.
+        exclLg (dict): exclL indexed by integer class ID.
+        monLq (dict): monLg compiled into query molecules.
+        exclLq (dict): exclLg compiled into query molecules.
+        Ps_rxnL (dict): Polymerization reactions.
+        Ps_classL (dict): Polymer classes.
+        Ps_GenL (dict): Polymer generation rules.
+        rxn_keys (dict): Reaction SMARTS to the first key of Ps_rxnL.
+        Ps_GenK (dict): Ps_rxnL keys of the reactions in Ps_GenL,
+            in the order of Ps_GenL[P_class].
+        Ps_GenT (dict): Reactant templates (mon1, mon2) of the binary
+            reactions in Ps_GenL, in the order of Ps_GenL[P_class];
+            None for the homopolymerizations.
+        Ps_GenH (dict): Half reactions (half_rxns) of the binary
+            reactions in Ps_GenL, in the order of Ps_GenL[P_class];
+            None for the homopolymerizations.
+
+    """
+
+    def __init__(self, path=None):
+        self.path = path if path is not None else db_file
+
+    def _load_json(self, fnam):
+        with open(os.path.join(self.path, fnam), 'r') as f:
+            return json.load(f)
+
+    def _load_pickle(self, fnam):
+        with open(os.path.join(self.path, fnam), 'rb') as f:
+            return pickle.load(f)
+
+    @cached_property
+    def mon_vals(self):
+        return self._load_json('mon_vals.json')
+
+    @cached_property
+    def mon_dic(self):
+        return self._load_json('mon_dic.json')
+
+    @cached_property
+    def mon_dic_inv(self):
+        return {int(k): v
+                for k, v in self._load_json('mon_dic_inv.json').items()}
+
+    @cached_property
+    def monL(self):
+        return self._load_json('mon_lst.json')
+
+    @cached_property
+    def exclL(self):
+        return self._load_json('excl_lst.json')
+
+    @cached_property
+    def monLg(self):
+        return {int(k): v for k, v in self.monL.items()}
+
+    @cached_property
+    def exclLg(self):
+        return {int(k): v for k, v in self.exclL.items()}
+
+    @cached_property
+    def monLq(self):
+        # SMARTS compiled once per process, keyed by monomer class ID
+        return compile_patts(self.monLg)
+
+    @cached_property
+    def exclLq(self):
+        return compile_patts(self.exclLg)
+
+    @cached_property
+    def Ps_rxnL(self):
+        return self._load_pickle('ps_rxn.pkl')
+
+    @cached_property
+    def Ps_classL(self):
+        return self._load_json('ps_class.json')
+
+    @cached_property
+    def Ps_GenL(self):
+        return self._load_pickle('ps_gen.pkl')
+
+    @cached_property
+    def rxn_keys(self):
+        # reactions are serialized once per process instead of per rule
+        keys = {}
+        for k, v in self.Ps_rxnL.items():
+            keys.setdefault(AllChem.ReactionToSmarts(v), k)
+        return keys
+
+    @cached_property
+    def Ps_GenK(self):
+        return {P_class: [self.rxn_keys.get(AllChem.ReactionToSmarts(P_set[2]))
+                          for P_set in self.Ps_GenL[str(P_class)]]
+                for P_class in self.Ps_classL}
+
+    @cached_property
+    def Ps_GenT(self):
+        temps = {}
+        for P_class in self.Ps_classL:
+            temps[P_class] = []
+            for P_set in self.Ps_GenL[str(P_class)]:
+                rxn = P_set[2]
+                if P_set[1] == 'none' or rxn.GetNumReactantTemplates() != 2:
+                    temps[P_class].append(None)
+                else:
+                    temps[P_class].append((rxn.GetReactantTemplate(0),
+                                           rxn.GetReactantTemplate(1)))
+        return temps
+
+    @cached_property
+    def Ps_GenH(self):
+        return {P_class: [None if P_set[1] == 'none' else half_rxns(P_set[2])
+                          for P_set in self.Ps_GenL[str(P_class)]]
+                for P_class in self.Ps_classL}
+
+
+rules = Rules()
+
+# names of the rules available as module attributes of monc and polg
+rule_names = [
+    'mon_vals', 'mon_dic', 'mon_dic_inv', 'monL', 'exclL',
+    'monLg', 'exclLg', 'monLq', 'exclLq',
+    'Ps_rxnL', 'Ps_classL', 'Ps_GenL', 'rxn_keys', 'Ps_GenK', 'Ps_GenT',
+    'Ps_GenH'
+]
+
+# end